@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+
+
+class OrcamentoRequisicoes:
+    """Limite global de requisições por minuto (balde de fichas) para o loop asyncio"""
+
+    def __init__(self, requisicoes_por_minuto=30):
+        self.capacidade = requisicoes_por_minuto
+        self.fichas = float(requisicoes_por_minuto)
+        self.taxa = requisicoes_por_minuto / 60
+        self._atualizado_em = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._atualizado_em) * self.taxa)
+        self._atualizado_em = agora
+
+    async def adquirir(self, parar=None):
+        """Aguarda até haver orçamento para uma requisição
+
+        Com um asyncio.Event em parar, a espera termina assim que ele é
+        sinalizado, sem consumir ficha: retorna False nesse caso e True quando
+        a ficha foi obtida.
+        """
+        while True:
+            if parar is not None and parar.is_set():
+                return False
+            self._repor()
+            if self.fichas >= 1:
+                self.fichas -= 1
+                return True
+            espera = (1 - self.fichas) / self.taxa
+            if parar is None:
+                await asyncio.sleep(espera)
+                continue
+            try:
+                await asyncio.wait_for(parar.wait(), timeout=espera)
+            except asyncio.TimeoutError:
+                pass
+
+
+class AgendadorAdaptativo:
+    """Intervalo de consulta de cada termo ajustado à frequência com que surgem notícias novas
+
+    A taxa de notícias novas por termo é uma média móvel exponencial gravada
+    no banco, então sobrevive a reinícios. Termos ativos são consultados com
+    mais frequência (cerca de alvo_novas notícias novas por consulta) e termos
+    frios recuam até intervalo_max. Se a soma das consultas passar do
+    orçamento por minuto, todos os intervalos são esticados na mesma proporção.
+    """
+
+    def __init__(self, store, requisicoes_por_minuto=30, intervalo_padrao=900, intervalo_min=120,
+                 intervalo_max=6 * 3600, alvo_novas=1, suavizacao=0.3):
+        self.store = store
+        self.requisicoes_por_minuto = requisicoes_por_minuto
+        # Intervalo dos termos ainda sem histórico
+        self.intervalo_padrao = intervalo_padrao
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self.alvo_novas = alvo_novas
+        # Peso da última observação na média móvel da taxa
+        self.suavizacao = suavizacao
+
+        # termo -> (taxa de novas por segundo ou None, horário da última coleta ou None)
+        self._estatisticas = {}
+        # termo -> intervalo desejado (sem o ajuste ao orçamento) e soma das requisições por minuto
+        self._intervalos = {}
+        self._demanda = 0.0
+        self._trava = threading.Lock()
+
+        with self.store.conectar() as conexao:
+            conexao.execute('''
+                CREATE TABLE IF NOT EXISTS agendamento_termos (
+                    termo TEXT PRIMARY KEY,
+                    taxa REAL,
+                    ultima_coleta REAL,
+                    coletas INTEGER NOT NULL DEFAULT 0,
+                    novas INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+    def carregar(self, termos):
+        """Carrega o histórico gravado dos termos que serão agendados"""
+        with self.store.conectar() as conexao:
+            gravadas = {
+                linha[0]: (linha[1], linha[2])
+                for linha in conexao.execute('SELECT termo, taxa, ultima_coleta FROM agendamento_termos')
+            }
+        with self._trava:
+            for termo in termos:
+                self._estatisticas[termo] = gravadas.get(termo, (None, None))
+                self._atualizar_intervalo(termo)
+
+    def _intervalo_desejado(self, taxa):
+        if taxa is None:
+            return self.intervalo_padrao
+        if taxa <= 0:
+            return self.intervalo_max
+        return min(max(self.alvo_novas / taxa, self.intervalo_min), self.intervalo_max)
+
+    def _atualizar_intervalo(self, termo):
+        """Recalcula o intervalo do termo mantendo a demanda total em dia (chamar com a trava)"""
+        anterior = self._intervalos.get(termo)
+        if anterior:
+            self._demanda -= 60 / anterior
+        intervalo = self._intervalo_desejado(self._estatisticas[termo][0])
+        self._intervalos[termo] = intervalo
+        self._demanda += 60 / intervalo
+
+    def fator_orcamento(self):
+        """Quanto os intervalos precisam ser esticados para caber no orçamento"""
+        return max(1.0, self._demanda / self.requisicoes_por_minuto)
+
+    def intervalo(self, termo):
+        """Intervalo até a próxima consulta do termo"""
+        with self._trava:
+            if termo not in self._estatisticas:
+                self._estatisticas[termo] = (None, None)
+                self._atualizar_intervalo(termo)
+            return self._intervalos[termo] * self.fator_orcamento()
+
+    def registrar(self, termo, novas, agora=None):
+        """Registra o resultado de uma consulta: quantas notícias únicas eram novas"""
+        agora = time.time() if agora is None else agora
+        with self._trava:
+            taxa, ultima_coleta = self._estatisticas.get(termo, (None, None))
+            # A primeira consulta só estabelece a referência: ela traz o acumulado do feed
+            if ultima_coleta is not None and agora > ultima_coleta:
+                observada = novas / (agora - ultima_coleta)
+                taxa = observada if taxa is None else (1 - self.suavizacao) * taxa + self.suavizacao * observada
+            self._estatisticas[termo] = (taxa, agora)
+            self._atualizar_intervalo(termo)
+
+        with self.store.conectar() as conexao:
+            conexao.execute('''
+                INSERT INTO agendamento_termos (termo, taxa, ultima_coleta, coletas, novas) VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(termo) DO UPDATE SET
+                    taxa = excluded.taxa,
+                    ultima_coleta = excluded.ultima_coleta,
+                    coletas = coletas + 1,
+                    novas = novas + excluded.novas
+            ''', (termo, taxa, agora, novas))
+
+    def resumo(self):
+        """Estatísticas gravadas por termo, dos mais ativos para os mais frios"""
+        with self.store.conectar() as conexao:
+            return conexao.execute('''
+                SELECT termo, taxa * 3600 AS novas_por_hora, coletas, novas,
+                       CAST(novas AS REAL) / MAX(coletas, 1) AS novas_por_coleta
+                FROM agendamento_termos ORDER BY taxa DESC
+            ''').fetchall()
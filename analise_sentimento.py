@@ -1,90 +1,219 @@
+import argparse
 import pandas as pd
+import numpy as np
+import os
 import re
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from armazenamento import TIPO_SENTIMENTO, NewsStore, tipar_noticias, tipar_publicacao
+from lexico import NEGADORES, AutomatoLexico
+from memo_sentimentos import MemoSentimentos
+from metricas import metricas
+
+# pyarrow é opcional: sem ele a classificação em lote recai na versão linha a linha
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Ordem das colunas nos arquivos de saída
+ORDEM_COLUNAS = [
+    'title', 'link', 'description', 'pub_date', 'published', 'search_term', 'collected_at', 'full_text', 'sentiment'
+]
+
+# Palavras comuns que devem ser ignoradas na extração de palavras-chave
+STOP_WORDS = frozenset({
+    'para', 'com', 'uma', 'dos', 'das', 'que', 'por', 'como', 
+    'mais', 'ter', 'ser', 'ter', 'sua', 'seu', 'seus', 'suas',
+    'este', 'esta', 'isto', 'esse', 'essa', 'isso', 'aquele',
+    'aquela', 'aquilo', 'todo', 'toda', 'todos', 'todas',
+    'muito', 'muita', 'muitos', 'muitas', 'sobre', 'entre',
+    'durante', 'depois', 'antes', 'ainda', 'também', 'assim',
+    'onde', 'quando', 'porque', 'pois', 'mas', 'porém', 'contudo',
+    'entretanto', 'então', 'agora', 'hoje', 'ontem', 'amanhã',
+    'ano', 'anos', 'dia', 'dias', 'vez', 'vezes', 'pode', 'podem',
+    'deve', 'devem', 'vai', 'vão', 'está', 'estão', 'foi', 'foram'
+})
+
+class Tokenizador:
+    """Tokenizador compartilhado pela análise de sentimento, palavras-chave e nuvem de palavras"""
+    
+    # Compilados uma única vez para todas as chamadas
+    PADRAO_PONTUACAO = re.compile(r'[^\w\sáéíóúâêîôûàèìòùãõçÁÉÍÓÚÂÊÎÔÛÀÈÌÒÙÃÕÇ]')
+    PADRAO_ESPACOS = re.compile(r'\s+')
+    # Depois de trocar a pontuação por espaços e separar nos espaços, sobram
+    # exatamente as sequências de caracteres de palavra: basta uma passada
+    PADRAO_PALAVRA = re.compile(r'\w+')
+    # Equivalente do PADRAO_PONTUACAO para o RE2 (Arrow), cujo \w se limita ao ASCII
+    PADRAO_PONTUACAO_ARROW = r'[^\pL\pN_\s]'
+    
+    def __init__(self, stop_words=STOP_WORDS):
+        self.stop_words = frozenset(stop_words)
+    
+    def preparar_texto(self, texto):
+        """Prepara o texto para análise"""
+        if not texto:
+            return ""
+        
+        texto = texto.lower()
+        # Remove pontuação mantendo acentos
+        texto = self.PADRAO_PONTUACAO.sub(' ', texto)
+        # Remove espaços múltiplos
+        return self.PADRAO_ESPACOS.sub(' ', texto).strip()
+    
+    def tokenize(self, texto, tamanho_min=1, remover_stop_words=False):
+        """Gera as palavras do texto (em minúsculas) em uma única passada"""
+        if not texto:
+            return
+        
+        palavras = self.PADRAO_PALAVRA.findall(texto.lower())
+        if tamanho_min <= 1 and not remover_stop_words:
+            yield from palavras
+            return
+        
+        stop_words = self.stop_words if remover_stop_words else ()
+        for palavra in palavras:
+            if len(palavra) >= tamanho_min and palavra not in stop_words:
+                yield palavra
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, tokenizador=None):
+        self.tokenizador = tokenizador or Tokenizador()
+        
         # Palavras que indicam sentimento positivo
-        self.palavras_positivas = {
+        self.palavras_positivas = frozenset({
             'boa', 'bom', 'excelente', 'ótimo', 'incrível', 'inovador', 'inovação', 
             'progresso', 'avanço', 'sucesso', 'positivo', 'benefício', 'beneficia',
             'melhora', 'melhor', 'eficiente', 'eficiência', 'revolucionar', 
             'transformar', 'oportunidade', 'crescimento', 'desenvolvimento',
             'modernizar', 'facilitar', 'otimizar', 'vantagem', 'promissor',
             'futuro', 'tecnológico', 'digital', 'inteligente', 'automatizar'
-        }
+        })
         
         # Palavras que indicam sentimento negativo
-        self.palavras_negativas = {
+        self.palavras_negativas = frozenset({
             'ruim', 'péssimo', 'terrível', 'problema', 'prejuízo', 'perda', 
             'ameaça', 'risco', 'perigo', 'negativo', 'preocupação', 'medo',
             'substituir', 'demitir', 'desemprego', 'eliminar', 'reduzir',
             'cortar', 'falha', 'erro', 'defeito', 'limitação', 'dificuldade',
             'complexo', 'caro', 'custoso', 'invasivo', 'privacidade', 'ética'
-        }
+        })
         
-    def preparar_texto(self, texto):
-        """Prepara o texto para análise"""
-        if not texto:
-            return ""
+        # Expressões de várias palavras, pontuadas como uma unidade
+        self.expressoes_positivas = frozenset({
+            'geração de empregos', 'qualidade de vida', 'ganho de produtividade',
+            'inclusão digital', 'redução de custos', 'acesso gratuito'
+        })
+        self.expressoes_negativas = frozenset({
+            'corte de empregos', 'perda de empregos', 'vazamento de dados',
+            'falta de transparência', 'uso indevido', 'notícias falsas', 'viés algorítmico'
+        })
         
-        texto = texto.lower()
-        # Remove pontuação mantendo acentos
-        texto = re.sub(r'[^\w\sáéíóúâêîôûàèìòùãõçÁÉÍÓÚÂÊÎÔÛÀÈÌÒÙÃÕÇ]', ' ', texto)
-        # Remove espaços múltiplos
-        texto = re.sub(r'\s+', ' ', texto).strip()
-        return texto
+        # Palavras e expressões compiladas em um único autômato, com negação
+        self.automato = AutomatoLexico(self._expressoes_lexico(), negadores=NEGADORES)
+        # Muda sempre que as listas acima mudam: invalida os sentimentos memorizados
+        self.versao_lexico = self.automato.versao
+        # Vocabulário do autômato para a classificação em lote
+        self._vocabulario_lexico = pa.array(self.automato.vocabulario, type=pa.string()) if pa is not None else None
     
-    def analisar_sentimento(self, texto):
-        """Analisa o sentimento do texto baseado em palavras-chave"""
-        if not texto:
-            return 'neutro'
-            
-        texto_limpo = self.preparar_texto(texto)
-        palavras = set(texto_limpo.split())
-        
-        pontos_positivos = len(palavras.intersection(self.palavras_positivas))
-        pontos_negativos = len(palavras.intersection(self.palavras_negativas))
-        
+    def _expressoes_lexico(self):
+        """Tokens de cada palavra ou expressão do léxico -> polaridade"""
+        expressoes = {}
+        for polaridade, termos in ((1, self.palavras_positivas | self.expressoes_positivas),
+                                   (-1, self.palavras_negativas | self.expressoes_negativas)):
+            for termo in termos:
+                expressoes[tuple(self.tokenizador.tokenize(termo))] = polaridade
+        return expressoes
+    
+    def _rotulo(self, pontos_positivos, pontos_negativos):
         if pontos_positivos > pontos_negativos:
             return 'positivo'
         elif pontos_negativos > pontos_positivos:
             return 'negativo'
         else:
             return 'neutro'
+        
+    def preparar_texto(self, texto):
+        """Prepara o texto para análise"""
+        return self.tokenizador.preparar_texto(texto)
     
-    def extrair_palavras_chave(self, lista_textos, tamanho_min=3, top_n=20):
-        """Extrai as palavras mais frequentes dos textos"""
-        todas_palavras = []
+    def analisar_sentimento(self, texto):
+        """Analisa o sentimento do texto pelas palavras e expressões do léxico
+        
+        Cada expressão conta uma vez por texto com a sua polaridade, invertida
+        quando precedida de perto por um negador.
+        """
+        if not texto:
+            return 'neutro'
+        
+        pontuados = set(self.automato.pontuar_documento(self.tokenizador.tokenize(texto)))
+        
+        pontos_positivos = sum(1 for _, polaridade in pontuados if polaridade > 0)
+        return self._rotulo(pontos_positivos, len(pontuados) - pontos_positivos)
+    
+    def classificar_textos(self, textos):
+        """Classifica uma coleção de textos de uma vez (mesmo resultado de analisar_sentimento)"""
+        textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+        if textos.empty:
+            return pd.Series([], index=textos.index, dtype=TIPO_SENTIMENTO)
+        if pa is None:
+            return textos.apply(self.analisar_sentimento)
+        
+        # Tokeniza a coluna inteira com os kernels do Arrow
+        texto_limpo = pc.replace_substring_regex(
+            pc.utf8_lower(pa.array(textos, type=pa.string())), Tokenizador.PADRAO_PONTUACAO_ARROW, ' '
+        )
+        listas_palavras = pc.utf8_split_whitespace(texto_limpo)
+        linhas = pc.list_parent_indices(listas_palavras).to_numpy().astype(np.int64)
+        
+        # Índice do léxico: cada palavra vira a sua posição no vocabulário (ou nula)
+        codigos = pc.index_in(pc.list_flatten(listas_palavras), value_set=self._vocabulario_lexico)
+        relevantes = codigos.is_valid().to_numpy(zero_copy_only=False)
+        codigos = codigos.fill_null(0).to_numpy()[relevantes].astype(np.int64)
+        linhas = linhas[relevantes]
         
-        for texto in lista_textos:
-            if texto:
-                texto_limpo = self.preparar_texto(texto)
-                palavras = [palavra for palavra in texto_limpo.split() 
-                           if len(palavra) >= tamanho_min and palavra not in self.obter_stop_words()]
-                todas_palavras.extend(palavras)
+        # Uma única varredura do autômato sobre os tokens conhecidos de todos os
+        # textos; o intervalo entre textos impede expressões e negações de atravessá-los
+        posicoes = np.flatnonzero(relevantes) + linhas * (self.automato.janela_negacao + 1)
+        inicios, padroes, polaridades = self.automato.pontuar(posicoes, codigos)
         
+        # Conta cada expressão (com a sua polaridade) uma única vez por texto
+        chaves = np.unique((linhas[inicios] * len(self.automato.expressoes) + padroes) * 2 + (polaridades > 0))
+        linhas_chaves = chaves // 2 // len(self.automato.expressoes)
+        positivas = (chaves % 2).astype(bool)
+        
+        pontos_positivos = np.bincount(linhas_chaves[positivas], minlength=len(textos))
+        pontos_negativos = np.bincount(linhas_chaves[~positivas], minlength=len(textos))
+        
+        # Códigos das categorias de TIPO_SENTIMENTO (positivo, negativo, neutro)
+        codigos_rotulos = np.where(
+            pontos_positivos > pontos_negativos, 0,
+            np.where(pontos_negativos > pontos_positivos, 1, 2)
+        ).astype(np.int8)
+        return pd.Series(pd.Categorical.from_codes(codigos_rotulos, dtype=TIPO_SENTIMENTO), index=textos.index)
+    
+    def extrair_palavras_chave(self, lista_textos, tamanho_min=3, top_n=20):
+        """Extrai as palavras mais frequentes dos textos"""
         # Conta a frequência das palavras
-        contagem_palavras = Counter(todas_palavras)
+        contagem_palavras = Counter()
+        with metricas.cronometrar('palavras_chave'):
+            for texto in lista_textos:
+                if texto:
+                    contagem_palavras.update(self.tokenizador.tokenize(texto, tamanho_min, remover_stop_words=True))
+        
         return contagem_palavras.most_common(top_n)
     
     def obter_stop_words(self):
         """Lista de palavras comuns que devem ser ignoradas"""
-        return {
-            'para', 'com', 'uma', 'dos', 'das', 'que', 'por', 'como', 
-            'mais', 'ter', 'ser', 'ter', 'sua', 'seu', 'seus', 'suas',
-            'este', 'esta', 'isto', 'esse', 'essa', 'isso', 'aquele',
-            'aquela', 'aquilo', 'todo', 'toda', 'todos', 'todas',
-            'muito', 'muita', 'muitos', 'muitas', 'sobre', 'entre',
-            'durante', 'depois', 'antes', 'ainda', 'também', 'assim',
-            'onde', 'quando', 'porque', 'pois', 'mas', 'porém', 'contudo',
-            'entretanto', 'então', 'agora', 'hoje', 'ontem', 'amanhã',
-            'ano', 'anos', 'dia', 'dias', 'vez', 'vezes', 'pode', 'podem',
-            'deve', 'devem', 'vai', 'vão', 'está', 'estão', 'foi', 'foram'
-        }
-    
-    def analyze_dataframe(self, df):
-        """Analisa o sentimento das notícias no DataFrame"""
+        return self.tokenizador.stop_words
+    
+    def analyze_dataframe(self, df, vetorizado=True, memo=None):
+        """Analisa o sentimento das notícias no DataFrame
+        
+        Com um MemoSentimentos, textos já analisados com o mesmo léxico
+        reaproveitam o sentimento gravado.
+        """
         if df.empty:
             return df
         
@@ -98,12 +227,31 @@ class SentimentAnalyzer:
         df['full_text'] = df['title'].fillna('') + ' ' + df['description'].fillna('')
         
         # Aplica a análise de sentimento
-        df['sentiment'] = df['full_text'].apply(self.analisar_sentimento)
+        with metricas.cronometrar('analise_sentimento'):
+            if memo is not None:
+                sentimentos = memo.classificar(df['full_text'])
+            elif vetorizado:
+                sentimentos = self.classificar_textos(df['full_text'])
+            else:
+                sentimentos = df['full_text'].apply(self.analisar_sentimento)
+            # Três rótulos repetidos em todas as linhas: coluna categórica
+            df['sentiment'] = sentimentos.astype(TIPO_SENTIMENTO)
         
+        metricas.incrementar('noticias_classificadas', len(df))
         return df
     
-    def gerar_dados_wordcloud(self, df):
-        """Prepara dados para gerar nuvem de palavras"""
+    def gerar_dados_wordcloud(self, df, indice=None, **filtros):
+        """Prepara dados para gerar nuvem de palavras
+        
+        Com um IndiceFrequencias, só as notícias ainda não indexadas são
+        tokenizadas e o resultado considera todas as notícias indexadas que
+        atendem aos filtros (inicio, fim, termo, sentimento).
+        """
+        if indice is not None:
+            if not df.empty:
+                indice.atualizar(df.to_dict('records'))
+            return dict(indice.top_n(20, **filtros))
+        
         if df.empty:
             return {}
         
@@ -116,22 +264,27 @@ def processar_sentimentos(arquivo_csv='noticias_ia_piaui.csv'):
     """Processa a análise de sentimento das notícias"""
     try:
         # Carrega o arquivo CSV
-        df = pd.read_csv(arquivo_csv, encoding='utf-8-sig', sep=',')
+        df = tipar_noticias(tipar_publicacao(pd.read_csv(arquivo_csv, encoding='utf-8-sig', sep=',')))
         print(f"Carregadas {len(df)} notícias do arquivo {arquivo_csv}")
         
         analisador = SentimentAnalyzer()
-        df_analisado = analisador.analyze_dataframe(df)
+        store = NewsStore()
+        df_analisado = analisador.analyze_dataframe(df, memo=MemoSentimentos(store, analisador))
         
         # Organiza as colunas
-        ordem_colunas = ['title', 'link', 'description', 'pub_date', 'search_term', 'collected_at', 'full_text', 'sentiment']
-        colunas_existentes = [col for col in ordem_colunas if col in df_analisado.columns]
+        colunas_existentes = [col for col in ORDEM_COLUNAS if col in df_analisado.columns]
         df_analisado = df_analisado[colunas_existentes]
         
         # Salva o resultado
         arquivo_saida = 'noticias_com_sentimento.csv'
-        df_analisado.to_csv(arquivo_saida, index=False, encoding='utf-8-sig', sep=',', quotechar='"', quoting=1)
+        with metricas.cronometrar('gravacao_csv'):
+            df_analisado.to_csv(arquivo_saida, index=False, encoding='utf-8-sig', sep=',', quotechar='"', quoting=1)
         print(f"\nResultados salvos em {arquivo_saida}")
         
+        # Atualiza o histórico persistente com os sentimentos calculados
+        store.upsert_noticias(df_analisado.to_dict('records'))
+        store.exportar_snapshot()
+        
         # Mostra estatísticas
         contagem_sentimentos = df_analisado['sentiment'].value_counts()
         print("\nDistribuição de Sentimentos:")
@@ -153,9 +306,95 @@ def processar_sentimentos(arquivo_csv='noticias_ia_piaui.csv'):
         print(f"Erro ao processar análise de sentimento: {e}")
         return pd.DataFrame(), {}
 
+# Analisador e memo reaproveitados por todos os lotes de um mesmo processo do pool
+_analisador_processo = None
+_memo_processo = None
+
+def _analisar_lote(lote):
+    """Analisa um lote de notícias (executado nos processos do pool)"""
+    global _analisador_processo, _memo_processo
+    if _analisador_processo is None:
+        _analisador_processo = SentimentAnalyzer()
+        _memo_processo = MemoSentimentos(NewsStore(), _analisador_processo)
+    
+    df_analisado = _analisador_processo.analyze_dataframe(tipar_noticias(tipar_publicacao(lote)), memo=_memo_processo)
+    colunas_existentes = [col for col in ORDEM_COLUNAS if col in df_analisado.columns]
+    return df_analisado[colunas_existentes]
+
+def processar_sentimentos_em_lotes(arquivo_csv='noticias_ia_piaui.csv', arquivo_saida='noticias_com_sentimento.csv',
+                                   tamanho_lote=50000, max_workers=None):
+    """Processa CSVs grandes em lotes, distribuindo a análise entre vários processos"""
+    max_workers = max_workers or os.cpu_count() or 1
+    # Limita os lotes em andamento para manter a memória constante
+    max_pendentes = max_workers * 2
+    
+    store = NewsStore()
+    contagem_sentimentos = Counter()
+    total = 0
+    
+    def gravar(df_analisado, primeiro):
+        # Só o primeiro lote grava o cabeçalho (e o BOM do UTF-8)
+        with metricas.cronometrar('gravacao_csv'):
+            df_analisado.to_csv(
+                arquivo_saida, index=False, sep=',', quotechar='"', quoting=1,
+                mode='w' if primeiro else 'a', header=primeiro,
+                encoding='utf-8-sig' if primeiro else 'utf-8'
+            )
+        store.upsert_noticias(df_analisado.to_dict('records'))
+        # A classificação roda nos processos do pool; a contagem é feita aqui
+        metricas.incrementar('noticias_classificadas', len(df_analisado))
+        contagem_sentimentos.update(df_analisado['sentiment'].value_counts().to_dict())
+        print(f"Lote gravado: {len(df_analisado)} notícias")
+    
+    try:
+        leitor = pd.read_csv(arquivo_csv, encoding='utf-8-sig', sep=',', chunksize=tamanho_lote)
+        pendentes = deque()
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for lote in leitor:
+                pendentes.append(executor.submit(_analisar_lote, lote))
+                if len(pendentes) >= max_pendentes:
+                    # Grava na ordem de leitura, mesmo que lotes posteriores terminem antes
+                    df_analisado = pendentes.popleft().result()
+                    gravar(df_analisado, total == 0)
+                    total += len(df_analisado)
+            
+            while pendentes:
+                df_analisado = pendentes.popleft().result()
+                gravar(df_analisado, total == 0)
+                total += len(df_analisado)
+        
+        store.exportar_snapshot()
+        print(f"\nResultados salvos em {arquivo_saida} ({total} notícias)")
+        return total, dict(contagem_sentimentos)
+        
+    except FileNotFoundError:
+        print(f"Arquivo {arquivo_csv} não encontrado. Execute primeiro o coletor de notícias.")
+        return 0, {}
+
 if __name__ == "__main__":
-    df_resultado, dados_wordcloud = processar_sentimentos()
+    parser = argparse.ArgumentParser(description="Classifica o sentimento das notícias coletadas")
+    parser.add_argument('--lotes', action='store_true',
+                        help='processa o CSV em lotes, em vários processos (para arquivos grandes)')
+    parser.add_argument('--entrada', default='noticias_ia_piaui.csv')
+    parser.add_argument('--saida', default='noticias_com_sentimento.csv', help='CSV gerado no modo --lotes')
+    parser.add_argument('--tamanho-lote', type=int, default=50000)
+    parser.add_argument('--workers', type=int, help='processos da análise (padrão: número de CPUs)')
+    args = parser.parse_args()
+    
+    if args.lotes:
+        total, contagem = processar_sentimentos_em_lotes(
+            args.entrada, args.saida, tamanho_lote=args.tamanho_lote, max_workers=args.workers
+        )
+        if total:
+            print("\nDistribuição de sentimentos:")
+            for sentimento, quantidade in sorted(contagem.items(), key=lambda item: -item[1]):
+                print(f"{sentimento}: {quantidade}")
+    else:
+        df_resultado, dados_wordcloud = processar_sentimentos(args.entrada)
+        
+        if not df_resultado.empty:
+            print("\nPrévia das notícias analisadas:")
+            print(df_resultado[['title', 'sentiment']].head())
     
-    if not df_resultado.empty:
-        print("\nPrévia das notícias analisadas:")
-        print(df_resultado[['title', 'sentiment']].head())
\ No newline at end of file
+    metricas.exportar()
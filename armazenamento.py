@@ -0,0 +1,655 @@
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import pandas as pd
+
+from metricas import metricas
+
+# pyarrow é opcional: sem ele o dashboard lê direto do SQLite
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Colunas persistidas, na mesma ordem usada pelos CSVs
+COLUNAS_NOTICIA = [
+    'title', 'link', 'description', 'pub_date', 'published', 'search_term', 'collected_at', 'full_text', 'sentiment'
+]
+
+# Rótulos de sentimento e tipo categórico usado nos DataFrames
+SENTIMENTOS = ['positivo', 'negativo', 'neutro']
+TIPO_SENTIMENTO = pd.CategoricalDtype(SENTIMENTOS)
+
+# Snapshot colunar (Arrow IPC) gravado ao lado do CSV de sentimentos. Cada
+# exportação cria uma versão imutável (noticias_com_sentimento.<n>.arrow) e
+# troca atomicamente o ponteiro <ARQUIVO_SNAPSHOT>.atual para ela
+ARQUIVO_SNAPSHOT = 'noticias_com_sentimento.arrow'
+
+# Versões antigas mantidas para leitores que ainda as estejam abrindo
+VERSOES_SNAPSHOT_MANTIDAS = 3
+
+# Esquema do snapshot: colunas de texto, published como timestamp UTC e
+# collected_at como timestamp local. Termo e sentimento ficam como texto no
+# arquivo (o formato IPC não aceita um dicionário diferente por lote) e viram
+# categóricos na leitura
+ESQUEMA_SNAPSHOT = pa.schema([
+    (coluna, {'published': pa.timestamp('ns', tz='UTC'), 'collected_at': pa.timestamp('ns')}.get(coluna, pa.string()))
+    for coluna in COLUNAS_NOTICIA
+]) if pa is not None else None
+
+# Snapshots já carregados, indexados por (caminho, colunas) -> (versão, DataFrame)
+_snapshots_carregados = {}
+
+# Data de uma linha da tabela noticias: a de publicação ou, na falta dela, a da coleta
+SQL_DATA_NOTICIA = "COALESCE(published, collected_at)"
+
+# Chave de agregação (dia, termo, sentimento) de uma linha da tabela noticias
+SQL_CHAVE_AGREGADO = f"substr(COALESCE({SQL_DATA_NOTICIA}, ''), 1, 10), COALESCE(search_term, ''), COALESCE(sentiment, '')"
+
+# pubDate no formato RFC-822 usado pelos feeds: "Mon, 01 Jan 2024 10:00:00 GMT"
+PADRAO_RFC822 = re.compile(
+    r'\s*(?:[A-Za-z]{3},\s*)?(\d{1,2})\s+([A-Za-z]{3})\s+(\d{2,4})\s+(\d{1,2}):(\d{2})(?::(\d{2}))?'
+    r'\s*(?:([+-])(\d{2})(\d{2})|([A-Za-z]{1,3}))?\s*$'
+)
+MESES_RFC822 = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+# Deslocamento (em minutos) dos fusos nomeados aceitos pela RFC-822
+FUSOS_RFC822 = {
+    'GMT': 0, 'UT': 0, 'UTC': 0, 'Z': 0, 'EST': -300, 'EDT': -240,
+    'CST': -360, 'CDT': -300, 'MST': -420, 'MDT': -360, 'PST': -480, 'PDT': -420
+}
+
+# Parâmetros de rastreamento que não identificam a notícia
+PARAMETROS_IGNORADOS = {'oc', 'fbclid', 'gclid'}
+
+
+def normalizar_link(link):
+    """Normaliza o link removendo fragmento, parâmetros de rastreamento e barra final"""
+    if not link or not isinstance(link, str):
+        return ""
+
+    partes = urlsplit(link.strip())
+    parametros = [
+        (nome, valor) for nome, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if nome not in PARAMETROS_IGNORADOS and not nome.startswith('utm_')
+    ]
+    return urlunsplit((
+        partes.scheme.lower(),
+        partes.netloc.lower(),
+        partes.path.rstrip('/'),
+        urlencode(parametros),
+        ''
+    ))
+
+
+def normalizar_titulo(titulo):
+    """Normaliza o título para comparação (minúsculas e espaços simples)"""
+    if not titulo or not isinstance(titulo, str):
+        return ""
+    return re.sub(r'\s+', ' ', titulo.lower()).strip()
+
+
+def chave_noticia(noticia):
+    """Chave única da notícia: link normalizado ou, na falta dele, o título normalizado"""
+    link = normalizar_link(noticia.get('link'))
+    if link:
+        return link
+    titulo = normalizar_titulo(noticia.get('title'))
+    return f"titulo:{titulo}" if titulo else ""
+
+
+def converter_data_publicacao(pub_date):
+    """Converte a data RFC-822 do feed para ISO 8601 em UTC (ordenável como texto)"""
+    if not pub_date or not isinstance(pub_date, str):
+        return None
+
+    # Caminho rápido: formato exato dos feeds, sem a inferência do parser genérico
+    encontrada = PADRAO_RFC822.match(pub_date)
+    if encontrada:
+        dia, mes, ano, hora, minuto, segundo, sinal, horas_fuso, minutos_fuso, fuso = encontrada.groups()
+        mes = MESES_RFC822.get(mes.lower())
+        deslocamento = FUSOS_RFC822.get(fuso.upper()) if fuso else 0
+        if sinal:
+            deslocamento = (int(horas_fuso) * 60 + int(minutos_fuso)) * (1 if sinal == '+' else -1)
+        if mes is not None and deslocamento is not None:
+            ano = int(ano)
+            if ano < 100:
+                ano += 2000 if ano < 50 else 1900
+            try:
+                data = datetime(ano, mes, int(dia), int(hora), int(minuto), int(segundo or 0), tzinfo=timezone.utc)
+            except ValueError:
+                return None
+            return (data - timedelta(minutes=deslocamento)).isoformat()
+
+    # Formatos fora do padrão ficam com o parser da biblioteca padrão
+    try:
+        data = parsedate_to_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data.astimezone(timezone.utc).isoformat()
+
+
+def converter_datas_publicacao(pub_dates):
+    """Converte uma coluna de datas RFC-822 em timestamps UTC, analisando cada valor distinto uma vez"""
+    serie = pd.Series(pub_dates)
+    convertidas = {valor: converter_data_publicacao(valor) for valor in serie.dropna().unique()}
+    return para_timestamp_utc(serie.map(convertidas))
+
+
+def para_timestamp_utc(valores):
+    """Converte datas ISO 8601 (texto ou datetime) em uma coluna datetime64 UTC"""
+    return pd.to_datetime(valores, utc=True, format='ISO8601')
+
+
+def tipar_publicacao(df):
+    """Garante a coluna published como datetime64 UTC, convertendo o pub_date quando ela falta"""
+    if 'published' in df.columns:
+        df['published'] = para_timestamp_utc(df['published'])
+    elif 'pub_date' in df.columns:
+        df['published'] = converter_datas_publicacao(df['pub_date'])
+    return df
+
+
+def para_datetime_local(valores):
+    """Converte datas ISO 8601 (texto ou datetime) em datetime64 sem fuso, no horário em que foram registradas"""
+    return pd.to_datetime(pd.Series(valores), utc=True, format='ISO8601', errors='coerce').dt.tz_localize(None)
+
+
+def tipar_noticias(df):
+    """Aplica o esquema compacto dos DataFrames de notícias às colunas presentes
+
+    published vira datetime64 UTC e collected_at datetime64; search_term e
+    sentiment, que se repetem em todas as linhas, viram categóricos (um código
+    inteiro por linha em vez de um objeto de texto).
+    """
+    if 'published' in df.columns:
+        df['published'] = para_timestamp_utc(df['published'])
+    if 'collected_at' in df.columns:
+        df['collected_at'] = para_datetime_local(df['collected_at'])
+    if 'search_term' in df.columns:
+        df['search_term'] = df['search_term'].astype('category')
+    if 'sentiment' in df.columns:
+        df['sentiment'] = df['sentiment'].astype(TIPO_SENTIMENTO)
+    return df
+
+
+def normalizar_data_publicacao(noticia):
+    """Data de publicação da notícia em ISO 8601 UTC: a já convertida ou a do pub_date"""
+    publicada = noticia.get('published')
+    if isinstance(publicada, datetime) and not pd.isna(publicada):
+        if publicada.tzinfo is None:
+            publicada = publicada.replace(tzinfo=timezone.utc)
+        return publicada.astimezone(timezone.utc).isoformat()
+    if isinstance(publicada, str) and publicada:
+        try:
+            return normalizar_data_publicacao({'published': datetime.fromisoformat(publicada)})
+        except ValueError:
+            pass
+    return converter_data_publicacao(noticia.get('pub_date'))
+
+
+def arquivo_ponteiro_snapshot(caminho=ARQUIVO_SNAPSHOT):
+    """Arquivo com o nome da versão atual do snapshot"""
+    return f"{caminho}.atual"
+
+
+def versao_snapshot(caminho=ARQUIVO_SNAPSHOT):
+    """Nome do arquivo da versão publicada do snapshot (None se nenhuma foi publicada)"""
+    try:
+        with open(arquivo_ponteiro_snapshot(caminho), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _substituir_arquivo(origem, destino, tentativas=5):
+    """os.replace com novas tentativas: no Windows falha enquanto outro processo lê o destino"""
+    for tentativa in range(tentativas):
+        try:
+            os.replace(origem, destino)
+            return
+        except PermissionError:
+            if tentativa == tentativas - 1:
+                raise
+            time.sleep(0.05 * 2 ** tentativa)
+
+
+def carregar_snapshot(caminho=ARQUIVO_SNAPSHOT, colunas=None):
+    """Carrega a versão publicada do snapshot mapeada em memória, relendo só quando ela muda
+
+    As versões são imutáveis, então todas as sessões (e processos) que leem a
+    mesma versão compartilham as páginas do arquivo mapeado em vez de copiar
+    os dados; a troca de versão é atômica pelo ponteiro.
+    """
+    if pa is None:
+        return None
+
+    chave = (os.path.abspath(caminho), tuple(colunas) if colunas else None)
+    # A versão lida pode ser removida por uma exportação concorrente antes da
+    # abertura: nesse caso o ponteiro já aponta para uma mais nova
+    for _ in range(VERSOES_SNAPSHOT_MANTIDAS):
+        versao = versao_snapshot(caminho)
+        if versao is None:
+            return None
+        carregado = _snapshots_carregados.get(chave)
+        if carregado and carregado[0] == versao:
+            return carregado[1]
+        try:
+            # Sem compressão o mapeamento evita cópias: as colunas de texto continuam
+            # apoiadas nos buffers do arquivo em vez de virarem objetos Python
+            tabela = feather.read_table(os.path.join(os.path.dirname(caminho), versao), memory_map=True)
+            break
+        except FileNotFoundError:
+            continue
+    else:
+        return None
+
+    # Snapshot de uma versão anterior do esquema: quem chama regrava a partir do banco
+    esquema = tabela.schema
+    if any(nome not in esquema.names or esquema.field(nome).type != ESQUEMA_SNAPSHOT.field(nome).type
+           for nome in colunas or COLUNAS_NOTICIA):
+        return None
+    if colunas:
+        tabela = tabela.select(colunas)
+    df = tipar_noticias(tabela.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get))
+    _snapshots_carregados[chave] = (versao, df)
+    return df
+
+
+class NewsStore:
+    """Armazenamento persistente das notícias em SQLite, sem perda de histórico"""
+
+    def __init__(self, caminho='noticias.db', somente_leitura=False):
+        self.caminho = caminho
+        # Leitores (dashboards no modo compartilhado) não criam tabelas nem migram o
+        # banco: o esquema é mantido pelo processo que grava
+        self.somente_leitura = somente_leitura
+        self._indice = None
+        self._deduplicador = None
+        if somente_leitura:
+            return
+        with self.conectar() as conexao:
+            # WAL permite que o dashboard leia enquanto a coleta grava
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.executescript(f'''
+                CREATE TABLE IF NOT EXISTS noticias (
+                    id INTEGER PRIMARY KEY,
+                    chave TEXT NOT NULL,
+                    title TEXT,
+                    link TEXT,
+                    description TEXT,
+                    pub_date TEXT,
+                    published TEXT,
+                    search_term TEXT,
+                    collected_at TEXT,
+                    full_text TEXT,
+                    sentiment TEXT
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_noticias_chave ON noticias(chave);
+                CREATE INDEX IF NOT EXISTS idx_noticias_published ON noticias(published);
+                CREATE INDEX IF NOT EXISTS idx_noticias_termo ON noticias(search_term, published);
+                CREATE INDEX IF NOT EXISTS idx_noticias_sentimento ON noticias(sentiment, published);
+                CREATE INDEX IF NOT EXISTS idx_noticias_data ON noticias({SQL_DATA_NOTICIA});
+                CREATE TABLE IF NOT EXISTS agregados_diarios (
+                    dia TEXT NOT NULL,
+                    search_term TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    quantidade INTEGER NOT NULL,
+                    PRIMARY KEY (dia, search_term, sentiment)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS metadados (
+                    nome TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL
+                );
+            ''')
+            # Versão 1: o cubo passou a contar também as notícias ainda não compactadas
+            if conexao.execute('PRAGMA user_version').fetchone()[0] < 1:
+                conexao.execute(f'''
+                    INSERT INTO agregados_diarios
+                    SELECT {SQL_CHAVE_AGREGADO}, COUNT(*) FROM noticias WHERE true GROUP BY 1, 2, 3
+                    ON CONFLICT(dia, search_term, sentiment) DO UPDATE SET
+                        quantidade = quantidade + excluded.quantidade
+                ''')
+                conexao.execute('PRAGMA user_version = 1')
+
+    @contextmanager
+    def conectar(self, escrita=False):
+        """Abre uma conexão com transação confirmada ao final do bloco
+
+        Com escrita, a transação começa já com a trava de escrita (BEGIN
+        IMMEDIATE): leituras feitas para calcular o que gravar não podem ser
+        invalidadas por outro escritor antes da gravação.
+        """
+        if self.somente_leitura:
+            conexao = sqlite3.connect(f"{Path(self.caminho).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+        else:
+            conexao = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            with conexao:
+                if escrita:
+                    conexao.execute('BEGIN IMMEDIATE')
+                yield conexao
+        finally:
+            conexao.close()
+
+    def _preparar_registro(self, noticia):
+        """Monta a tupla de valores de uma notícia para gravação"""
+        valores = {}
+        for coluna in COLUNAS_NOTICIA:
+            valor = noticia.get(coluna)
+            if valor is None or pd.isna(valor):
+                valores[coluna] = None
+            else:
+                valores[coluna] = valor.isoformat() if isinstance(valor, datetime) else str(valor)
+        valores['chave'] = chave_noticia(noticia)
+        valores['published'] = normalizar_data_publicacao(noticia)
+        return valores
+
+    def upsert_noticias(self, noticias):
+        """Insere ou atualiza as notícias em uma única transação
+
+        Na mesma transação o cubo agregados_diarios recebe as notícias novas e
+        as que mudaram de dia, termo ou sentimento. Notícias anteriores à data
+        já compactada pela retenção são descartadas: já estão contadas no cubo
+        e voltariam como novas. Depois da gravação as notícias entram no índice
+        de frequências de palavras e no de quase duplicatas, qualquer que seja
+        o escritor (coleta, importação de CSV, processar_sentimentos). Retorna
+        a lista de chaves das notícias que ainda não existiam.
+        """
+        registros = {}
+        for noticia in noticias:
+            registro = self._preparar_registro(noticia)
+            if registro['chave']:
+                registros[registro['chave']] = registro
+
+        if not registros:
+            return []
+
+        colunas = ['chave'] + COLUNAS_NOTICIA
+        marcadores = ', '.join(f':{coluna}' for coluna in colunas)
+
+        # A leitura das chaves anteriores, o upsert e os deltas do cubo sob a mesma trava
+        with self.conectar(escrita=True) as conexao:
+            limite = self.limite_compactado(conexao)
+            if limite is not None:
+                aceitos = {chave: registro for chave, registro in registros.items() if not self._compactado(registro, limite)}
+                metricas.incrementar('noticias_ja_compactadas', len(registros) - len(aceitos))
+                registros = aceitos
+                if not registros:
+                    return []
+
+            anteriores = self._chaves_agregado(conexao, list(registros))
+            conexao.executemany(f'''
+                INSERT INTO noticias ({', '.join(colunas)}) VALUES ({marcadores})
+                ON CONFLICT(chave) DO UPDATE SET
+                    title = excluded.title,
+                    description = excluded.description,
+                    pub_date = COALESCE(excluded.pub_date, noticias.pub_date),
+                    published = COALESCE(excluded.published, noticias.published),
+                    full_text = COALESCE(excluded.full_text, noticias.full_text),
+                    sentiment = COALESCE(excluded.sentiment, noticias.sentiment)
+            ''', registros.values())
+
+            atuais = self._chaves_agregado(conexao, list(registros))
+            deltas = Counter()
+            for chave, agregado in atuais.items():
+                anterior = anteriores.get(chave)
+                if anterior != agregado:
+                    deltas[agregado] += 1
+                    if anterior is not None:
+                        deltas[anterior] -= 1
+            self._aplicar_deltas(conexao, deltas)
+
+        self._indexar(list(registros))
+        return [chave for chave in registros if chave not in anteriores]
+
+    @property
+    def indice(self):
+        """Índice de frequências de palavras deste banco, criado no primeiro uso"""
+        if self._indice is None:
+            # indice_palavras importa este módulo
+            from indice_palavras import IndiceFrequencias
+            self._indice = IndiceFrequencias(self)
+        return self._indice
+
+    @property
+    def deduplicador(self):
+        """Detector de quase duplicatas deste banco, criado no primeiro uso"""
+        if self._deduplicador is None:
+            # deduplicacao importa este módulo
+            from deduplicacao import DetectorDuplicatas
+            self._deduplicador = DetectorDuplicatas(self)
+        return self._deduplicador
+
+    def _indexar(self, chaves, tamanho_lote=500):
+        """Atualiza os índices derivados com as notícias gravadas
+
+        As linhas são relidas do banco: um sentimento ou data ausente no lote
+        gravado não apaga o valor mantido pelo upsert.
+        """
+        colunas = ', '.join(COLUNAS_NOTICIA)
+        with self.conectar() as conexao:
+            for inicio in range(0, len(chaves), tamanho_lote):
+                lote = chaves[inicio:inicio + tamanho_lote]
+                marcadores = ', '.join('?' * len(lote))
+                cursor = conexao.execute(f'SELECT {colunas} FROM noticias WHERE chave IN ({marcadores})', lote)
+                gravadas = [dict(zip(COLUNAS_NOTICIA, linha)) for linha in cursor]
+                self.indice.atualizar(gravadas)
+                self.deduplicador.registrar(gravadas)
+
+    @staticmethod
+    def _compactado(registro, limite):
+        """Mesmo critério da retenção: published antes do limite ou, sem ele, collected_at"""
+        data = registro['published'] if registro['published'] is not None else registro['collected_at']
+        return data is not None and data < limite
+
+    def limite_compactado(self, conexao):
+        """Data (ISO 8601 UTC) antes da qual as notícias já foram compactadas (None se nunca)"""
+        linha = conexao.execute("SELECT valor FROM metadados WHERE nome = 'limite_compactado'").fetchone()
+        return linha[0] if linha else None
+
+    def registrar_compactacao(self, conexao, limite):
+        """Avança a data compactada pela retenção (nunca recua, mesmo se a janela aumentar)"""
+        conexao.execute('''
+            INSERT INTO metadados VALUES ('limite_compactado', ?)
+            ON CONFLICT(nome) DO UPDATE SET valor = max(valor, excluded.valor)
+        ''', (limite,))
+
+    def _chaves_agregado(self, conexao, chaves, tamanho_lote=500):
+        """Consulta, pelo índice único, a chave de agregação das notícias já gravadas"""
+        agregados = {}
+        for inicio in range(0, len(chaves), tamanho_lote):
+            lote = chaves[inicio:inicio + tamanho_lote]
+            marcadores = ', '.join('?' * len(lote))
+            cursor = conexao.execute(
+                f'SELECT chave, {SQL_CHAVE_AGREGADO} FROM noticias WHERE chave IN ({marcadores})', lote
+            )
+            agregados.update((linha[0], tuple(linha[1:])) for linha in cursor)
+        return agregados
+
+    def _aplicar_deltas(self, conexao, deltas):
+        """Soma as variações de contagem ao cubo, removendo as células zeradas"""
+        conexao.executemany('''
+            INSERT INTO agregados_diarios VALUES (?, ?, ?, ?)
+            ON CONFLICT(dia, search_term, sentiment) DO UPDATE SET
+                quantidade = quantidade + excluded.quantidade
+        ''', [chave + (quantidade,) for chave, quantidade in deltas.items() if quantidade])
+        conexao.executemany(
+            'DELETE FROM agregados_diarios WHERE dia = ? AND search_term = ? AND sentiment = ? AND quantidade <= 0',
+            [chave for chave, quantidade in deltas.items() if quantidade < 0]
+        )
+
+    def _montar_filtros(self, inicio=None, fim=None, termo=None, sentimento=None):
+        """Monta a cláusula WHERE e os parâmetros dos filtros de consulta
+
+        O período vale por dia inteiro e usa a mesma data do cubo
+        agregados_diarios (collected_at na falta de published), para que
+        contagens, páginas e agregados concordem.
+        """
+        condicoes = []
+        parametros = []
+        if inicio is not None:
+            condicoes.append(f'{SQL_DATA_NOTICIA} >= ?')
+            parametros.append(pd.Timestamp(inicio).strftime('%Y-%m-%d'))
+        if fim is not None:
+            condicoes.append(f'{SQL_DATA_NOTICIA} < ?')
+            parametros.append(pd.Timestamp(fim).strftime('%Y-%m-%d'))
+        if termo is not None:
+            condicoes.append('search_term = ?')
+            parametros.append(termo)
+        if sentimento is not None:
+            condicoes.append('sentiment = ?')
+            parametros.append(sentimento)
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return where, parametros
+
+    def consultar(self, inicio=None, fim=None, termo=None, sentimento=None, colunas=None,
+                  limite=None, deslocamento=0):
+        """Consulta as notícias filtrando por período, termo e sentimento"""
+        colunas = colunas or COLUNAS_NOTICIA
+        where, parametros = self._montar_filtros(inicio, fim, termo, sentimento)
+        sql = f"SELECT {', '.join(colunas)} FROM noticias {where} ORDER BY published DESC, id DESC"
+        if limite is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            parametros += [limite, deslocamento]
+
+        with self.conectar() as conexao:
+            return self._tipar(pd.read_sql_query(sql, conexao, params=parametros))
+
+    def _tipar(self, df):
+        """Converte as colunas lidas do banco (texto) para o esquema compacto dos DataFrames"""
+        return tipar_noticias(df)
+
+    def iterar_lotes(self, tamanho_lote=10000, ordenar_por_data=False, **filtros):
+        """Percorre o resultado da consulta em lotes, sem carregar a tabela inteira
+
+        Com ordenar_por_data as notícias saem em ordem crescente de published
+        (as sem data primeiro), percorrendo o índice idx_noticias_published.
+        """
+        where, parametros = self._montar_filtros(**filtros)
+        ordem = 'published, id' if ordenar_por_data else 'id'
+        sql = f"SELECT {', '.join(COLUNAS_NOTICIA)} FROM noticias {where} ORDER BY {ordem}"
+        with self.conectar() as conexao:
+            for lote in pd.read_sql_query(sql, conexao, params=parametros, chunksize=tamanho_lote):
+                yield self._tipar(lote)
+
+    def contar(self, **filtros):
+        """Conta as notícias que atendem aos filtros"""
+        where, parametros = self._montar_filtros(**filtros)
+        with self.conectar() as conexao:
+            return conexao.execute(f'SELECT COUNT(*) FROM noticias {where}', parametros).fetchone()[0]
+
+    def exportar_snapshot(self, caminho=ARQUIVO_SNAPSHOT, tamanho_lote=50000):
+        """Publica o histórico completo como uma nova versão do snapshot Arrow IPC
+
+        As linhas ficam ordenadas por published (timestamp UTC tipado), então
+        filtros de período no snapshot são buscas binárias. A versão é gravada
+        lote a lote num arquivo novo, nunca alterado depois, e só então o
+        ponteiro passa a apontar para ela.
+        """
+        if pa is None:
+            return False
+
+        raiz, extensao = os.path.splitext(caminho)
+        # Nome único por processo/thread: a coleta e a retenção podem exportar ao mesmo tempo
+        versao = os.path.basename(f"{raiz}.{time.time_ns()}-{os.getpid()}-{threading.get_ident()}{extensao}")
+        arquivo_versao = os.path.join(os.path.dirname(caminho), versao)
+        temporario = f"{arquivo_versao}.tmp"
+        with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, ESQUEMA_SNAPSHOT) as escritor:
+            for lote in self.iterar_lotes(tamanho_lote, ordenar_por_data=True):
+                escritor.write_table(pa.Table.from_pandas(lote, schema=ESQUEMA_SNAPSHOT, preserve_index=False))
+        os.replace(temporario, arquivo_versao)
+
+        ponteiro = arquivo_ponteiro_snapshot(caminho)
+        temporario = f"{ponteiro}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(versao)
+        _substituir_arquivo(temporario, ponteiro)
+
+        self._remover_versoes_antigas(caminho)
+        return True
+
+    def _remover_versoes_antigas(self, caminho):
+        """Apaga as versões do snapshot além das VERSOES_SNAPSHOT_MANTIDAS mais recentes"""
+        raiz, extensao = os.path.splitext(caminho)
+        atual = versao_snapshot(caminho)
+        # O nome começa pelo time_ns da exportação: ordem alfabética é a cronológica
+        versoes = sorted(glob.glob(f"{glob.escape(raiz)}.*{extensao}"), reverse=True)
+        for arquivo in versoes[VERSOES_SNAPSHOT_MANTIDAS:]:
+            if os.path.basename(arquivo) == atual:
+                continue
+            try:
+                os.remove(arquivo)
+            except OSError:
+                # Ainda mapeada por um leitor (Windows): fica para a próxima exportação
+                pass
+
+    def exportar_csv(self, destino, tamanho_lote=50000, **filtros):
+        """Grava as notícias filtradas em CSV no arquivo binário destino, lote a lote
+
+        Mesmo formato dos CSVs do pipeline (UTF-8 com BOM, tudo entre aspas),
+        em ordem crescente de published, sem montar o resultado em memória.
+        """
+        primeiro = True
+        for lote in self.iterar_lotes(tamanho_lote, ordenar_por_data=True, **filtros):
+            texto = lote.to_csv(index=False, header=primeiro, sep=',', quotechar='"', quoting=1)
+            destino.write(texto.encode('utf-8-sig' if primeiro else 'utf-8'))
+            primeiro = False
+        if primeiro:
+            destino.write(','.join(f'"{coluna}"' for coluna in COLUNAS_NOTICIA).encode('utf-8-sig') + b'\n')
+
+    def exportar_parquet(self, destino, tamanho_lote=50000, **filtros):
+        """Grava as notícias filtradas em Parquet (esquema do snapshot), um row group por lote"""
+        if pa is None:
+            return False
+
+        with pq.ParquetWriter(destino, ESQUEMA_SNAPSHOT) as escritor:
+            for lote in self.iterar_lotes(tamanho_lote, ordenar_por_data=True, **filtros):
+                escritor.write_table(pa.Table.from_pandas(lote, schema=ESQUEMA_SNAPSHOT, preserve_index=False))
+        return True
+
+    def consultar_agregados(self, inicio=None, fim=None, termo=None, sentimento=None):
+        """Cubo (dia, termo, sentimento) -> quantidade, incluindo as notícias já compactadas"""
+        condicoes = []
+        parametros = []
+        if inicio is not None:
+            condicoes.append('dia >= ?')
+            parametros.append(pd.Timestamp(inicio).strftime('%Y-%m-%d'))
+        if fim is not None:
+            condicoes.append('dia < ?')
+            parametros.append(pd.Timestamp(fim).strftime('%Y-%m-%d'))
+        if termo is not None:
+            condicoes.append('search_term = ?')
+            parametros.append(termo)
+        if sentimento is not None:
+            condicoes.append('sentiment = ?')
+            parametros.append(sentimento)
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self.conectar() as conexao:
+            return pd.read_sql_query(
+                f'SELECT dia, search_term, sentiment, quantidade FROM agregados_diarios {where} ORDER BY dia',
+                conexao, params=parametros
+            )
+
+    def importar_csv(self, arquivo_csv):
+        """Importa um CSV legado para o armazenamento"""
+        df = pd.read_csv(arquivo_csv, encoding='utf-8-sig', sep=None, engine='python')
+        return self.upsert_noticias(df.to_dict('records'))
@@ -0,0 +1,67 @@
+"""Compara a classificação linha a linha com a vetorizada em analyze_dataframe
+
+Uso: python -m benchmarks.bench_sentimento --linhas 100000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from analise_sentimento import SentimentAnalyzer
+
+PALAVRAS_NEUTRAS = [
+    'governo', 'estado', 'piauí', 'teresina', 'projeto', 'sistema', 'inteligência',
+    'artificial', 'dados', 'pesquisa', 'universidade', 'secretaria', 'lançamento',
+    'empresa', 'tecnologia', 'educação', 'saúde', 'servidores', 'programa', 'agência'
+]
+
+
+def gerar_textos(analisador, quantidade, semente=42):
+    """Gera títulos + descrições sintéticos misturando palavras neutras e do léxico"""
+    aleatorio = random.Random(semente)
+    vocabulario = (
+        PALAVRAS_NEUTRAS * 4
+        + sorted(analisador.palavras_positivas)
+        + sorted(analisador.palavras_negativas)
+        + sorted(analisador.obter_stop_words())
+    )
+    textos = []
+    for _ in range(quantidade):
+        palavras = aleatorio.choices(vocabulario, k=aleatorio.randint(12, 40))
+        textos.append(' '.join(palavras).capitalize() + '.')
+    return textos
+
+
+def medir(funcao, repeticoes):
+    """Retorna o melhor tempo (em segundos) entre as repetições"""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    analisador = SentimentAnalyzer()
+    df = pd.DataFrame({'title': gerar_textos(analisador, args.linhas), 'description': ''})
+
+    tempo_linha, resultado_linha = medir(lambda: analisador.analyze_dataframe(df.copy(), vetorizado=False), args.repeticoes)
+    tempo_vetor, resultado_vetor = medir(lambda: analisador.analyze_dataframe(df.copy(), vetorizado=True), args.repeticoes)
+
+    iguais = resultado_linha['sentiment'].equals(resultado_vetor['sentiment'])
+    print(f"Linhas: {args.linhas}")
+    print(f"Linha a linha (apply): {args.linhas / tempo_linha:,.0f} linhas/s ({tempo_linha:.3f} s)")
+    print(f"Vetorizado:            {args.linhas / tempo_vetor:,.0f} linhas/s ({tempo_vetor:.3f} s)")
+    print(f"Aceleração: {tempo_linha / tempo_vetor:.1f}x | Resultados idênticos: {iguais}")
+
+
+if __name__ == "__main__":
+    main()
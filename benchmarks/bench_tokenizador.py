@@ -0,0 +1,73 @@
+"""Compara o Tokenizador com a tokenização anterior (re.sub por chamada e stop words recriadas por palavra)
+
+Uso: python -m benchmarks.bench_tokenizador --textos 50000
+"""
+import argparse
+import re
+from collections import Counter
+
+from analise_sentimento import SentimentAnalyzer, STOP_WORDS
+from benchmarks.bench_sentimento import gerar_textos, medir
+
+
+def obter_stop_words_anterior():
+    """Como era antes: um novo conjunto a cada chamada"""
+    return set(STOP_WORDS)
+
+
+def preparar_texto_anterior(texto):
+    texto = texto.lower()
+    texto = re.sub(r'[^\w\sáéíóúâêîôûàèìòùãõçÁÉÍÓÚÂÊÎÔÛÀÈÌÒÙÃÕÇ]', ' ', texto)
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def extrair_palavras_chave_anterior(lista_textos, tamanho_min=3, top_n=20):
+    todas_palavras = []
+    for texto in lista_textos:
+        if texto:
+            texto_limpo = preparar_texto_anterior(texto)
+            palavras = [palavra for palavra in texto_limpo.split()
+                        if len(palavra) >= tamanho_min and palavra not in obter_stop_words_anterior()]
+            todas_palavras.extend(palavras)
+    return Counter(todas_palavras).most_common(top_n)
+
+
+def analisar_sentimento_anterior(analisador, texto):
+    palavras = set(preparar_texto_anterior(texto).split())
+    pontos_positivos = len(palavras.intersection(analisador.palavras_positivas))
+    pontos_negativos = len(palavras.intersection(analisador.palavras_negativas))
+    if pontos_positivos > pontos_negativos:
+        return 'positivo'
+    elif pontos_negativos > pontos_positivos:
+        return 'negativo'
+    return 'neutro'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--textos', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    analisador = SentimentAnalyzer()
+    textos = gerar_textos(analisador, args.textos)
+
+    casos = [
+        ('extrair_palavras_chave',
+         lambda: extrair_palavras_chave_anterior(textos),
+         lambda: analisador.extrair_palavras_chave(textos)),
+        ('analisar_sentimento',
+         lambda: [analisar_sentimento_anterior(analisador, texto) for texto in textos],
+         lambda: [analisador.analisar_sentimento(texto) for texto in textos]),
+    ]
+
+    print(f"Textos: {args.textos}")
+    for nome, anterior, atual in casos:
+        tempo_anterior, resultado_anterior = medir(anterior, args.repeticoes)
+        tempo_atual, resultado_atual = medir(atual, args.repeticoes)
+        print(f"{nome}: anterior {tempo_anterior:.3f} s | Tokenizador {tempo_atual:.3f} s | "
+              f"{tempo_anterior / tempo_atual:.1f}x | idênticos: {resultado_anterior == resultado_atual}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Gera um corpus sintético de notícias em português no esquema de save_to_csv
+
+Uso: python -m benchmarks.corpus_sintetico --linhas 1000000 --saida corpus.csv
+"""
+import argparse
+import time
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# Mesmas colunas e ordem gravadas por RSSNewsCollector.save_to_csv
+COLUNAS_CSV = ['title', 'link', 'description', 'pub_date', 'published', 'search_term', 'collected_at']
+
+TERMOS_BUSCA = ["Inteligência Artificial Piauí", "IA Piauí", "SIA Piauí", "Artificial Intelligence Piauí"]
+
+SUJEITOS = [
+    'Governo do Piauí', 'Universidade Federal do Piauí', 'Secretaria de Educação', 'Prefeitura de Teresina',
+    'Startup piauiense', 'Pesquisadores da UESPI', 'Assembleia Legislativa', 'Fapepi',
+    'Empresa de tecnologia de Parnaíba', 'Hospital estadual', 'Tribunal de Justiça do Piauí', 'Instituto Federal'
+]
+VERBOS = [
+    'lança', 'anuncia', 'apresenta', 'debate', 'critica', 'investe em', 'suspende', 'amplia',
+    'testa', 'recebe prêmio por', 'adia', 'inaugura'
+]
+OBJETOS = [
+    'projeto de inteligência artificial', 'sistema de IA para a saúde', 'curso gratuito de IA',
+    'plano estadual de inteligência artificial', 'laboratório de dados', 'chatbot de atendimento ao cidadão',
+    'ferramenta de reconhecimento facial', 'programa de capacitação em IA', 'modelo de linguagem em português',
+    'plataforma de dados abertos'
+]
+VEICULOS = ['G1 Piauí', 'Cidade Verde', 'Meio Norte', 'O Dia', 'GP1', 'Portal AZ', 'Folha de S.Paulo']
+# Frases com palavras do léxico de sentimento, para as três classes aparecerem
+COMPLEMENTOS = [
+    'A iniciativa foi considerada um sucesso e deve beneficiar estudantes e servidores.',
+    'Especialistas apontam riscos, problemas de privacidade e falta de transparência.',
+    'O anúncio foi feito nesta semana em Teresina.',
+    'A proposta traz inovação e crescimento para a economia do estado.',
+    'Houve críticas ao atraso e ao custo elevado do contrato.',
+    'O evento reuniu representantes do governo, de universidades e de empresas.',
+    'Segundo a secretaria, a ferramenta estará disponível no próximo ano.',
+    'A parceria promete melhorar o atendimento e reduzir filas.'
+]
+
+# Data de referência fixa para o corpus ser reproduzível
+REFERENCIA = pd.Timestamp('2025-01-01', tz='UTC')
+
+
+def _escolher(aleatorio, opcoes, quantidade):
+    return np.asarray(opcoes, dtype=object)[aleatorio.integers(0, len(opcoes), quantidade)]
+
+
+def gerar_lote(quantidade, inicio=0, semente=42):
+    """Gera `quantidade` notícias sintéticas; `inicio` numera os links (lotes não se repetem)"""
+    aleatorio = np.random.default_rng([semente, inicio])
+    titulos = (
+        pd.Series(_escolher(aleatorio, SUJEITOS, quantidade)) + ' '
+        + _escolher(aleatorio, VERBOS, quantidade) + ' '
+        + _escolher(aleatorio, OBJETOS, quantidade) + ' - '
+        + _escolher(aleatorio, VEICULOS, quantidade)
+    )
+    descricoes = (
+        titulos.str.rsplit(' - ', n=1).str[0] + '. '
+        + _escolher(aleatorio, COMPLEMENTOS, quantidade) + ' '
+        + _escolher(aleatorio, COMPLEMENTOS, quantidade)
+    )
+
+    # Publicações espalhadas pelo ano anterior à referência, coletadas até 2 dias depois
+    segundos = aleatorio.integers(0, 365 * 86400, quantidade)
+    publicacao = REFERENCIA - pd.to_timedelta(segundos, unit='s')
+    coleta = publicacao + pd.to_timedelta(aleatorio.integers(60, 2 * 86400, quantidade), unit='s')
+
+    return pd.DataFrame({
+        'title': titulos,
+        'link': 'https://news.google.com/rss/articles/sintetico-' + pd.Series(np.arange(inicio, inicio + quantidade)).astype(str),
+        'description': descricoes,
+        'pub_date': publicacao.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+        'published': publicacao,
+        # Mesmo esquema compacto de RSSNewsCollector.para_dataframe
+        'search_term': pd.Categorical.from_codes(aleatorio.integers(0, len(TERMOS_BUSCA), quantidade), TERMOS_BUSCA),
+        'collected_at': coleta.tz_localize(None)
+    }, columns=COLUNAS_CSV)
+
+
+def gerar_lotes(linhas, tamanho_lote=100000, semente=42):
+    """Percorre o corpus em lotes, sem manter as linhas todas em memória"""
+    for inicio in range(0, linhas, tamanho_lote):
+        yield gerar_lote(min(tamanho_lote, linhas - inicio), inicio, semente)
+
+
+def gerar_dataframe(linhas, semente=42):
+    """Corpus inteiro em um único DataFrame"""
+    return pd.concat(list(gerar_lotes(linhas, semente=semente)), ignore_index=True)
+
+
+def gravar_csv(caminho, linhas, tamanho_lote=100000, semente=42):
+    """Grava o corpus com as mesmas opções de save_to_csv (UTF-8 com BOM, tudo entre aspas)"""
+    for numero, lote in enumerate(gerar_lotes(linhas, tamanho_lote, semente)):
+        primeiro = numero == 0
+        lote.to_csv(
+            caminho, index=False, sep=',', quotechar='"', quoting=1,
+            mode='w' if primeiro else 'a', header=primeiro,
+            encoding='utf-8-sig' if primeiro else 'utf-8'
+        )
+
+
+def gerar_xml_rss(df):
+    """Feed RSS (como o do Google Notícias) com uma <item> por linha do DataFrame"""
+    itens = [
+        f"<item><title>{escape(titulo)}</title><link>{escape(link)}</link>"
+        f"<description>{escape(descricao)}</description><pubDate>{data}</pubDate></item>"
+        for titulo, link, descricao, data in zip(df['title'], df['link'], df['description'], df['pub_date'])
+    ]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Corpus sintético</title>'
+        + ''.join(itens) + '</channel></rss>'
+    ).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--saida', default='corpus_sintetico.csv')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    gravar_csv(args.saida, args.linhas, semente=args.semente)
+    print(f"{args.linhas} notícias gravadas em {args.saida} ({time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
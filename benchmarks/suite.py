@@ -0,0 +1,189 @@
+"""Suíte de benchmarks do pipeline sobre o corpus sintético, com saída em JSON
+
+Uso: python -m benchmarks.suite --tamanhos 1000,100000 --saida resultados.json
+     python -m benchmarks.suite --comparar resultados.json --tolerancia 0.25
+
+O corpus nunca fica inteiro em memória: o banco consultado pelos casos do
+dashboard é preenchido lote a lote, e os casos em memória usam no máximo
+LIMITE_LINHAS_MEMORIA linhas.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from analise_sentimento import SentimentAnalyzer
+from armazenamento import NewsStore
+from benchmarks.corpus_sintetico import REFERENCIA, gerar_dataframe, gerar_lotes, gerar_xml_rss
+from coletor_rss import RSSNewsCollector
+
+# Filtros típicos da interface (sentimento, termo e últimos 30 dias do corpus),
+# já nos parâmetros de consulta do armazenamento
+FILTROS_DASHBOARD = {'sentimento': 'positivo', 'termo': 'IA Piauí', 'inicio': REFERENCIA - pd.Timedelta(days=30)}
+
+# Itens do feed usado no parsing: acima disso o XML canônico ocuparia gigabytes
+LIMITE_ITENS_XML = 200000
+
+# Linhas dos casos que processam um DataFrame inteiro (análise, palavras-chave)
+LIMITE_LINHAS_MEMORIA = 1000000
+
+
+def cronometrar(funcao, repeticoes):
+    """Tempos (em segundos) de cada repetição"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def preencher_store(store, analisador, tamanho):
+    """Analisa e grava o corpus lote a lote, como a coleta faz"""
+    for lote in gerar_lotes(tamanho):
+        store.upsert_noticias(analisador.analyze_dataframe(lote).to_dict('records'))
+
+
+def casos(tamanho, diretorio):
+    """Casos medidos para um corpus: nome -> (linhas processadas, função sem argumentos)
+
+    As consultas do dashboard rodam sobre um banco criado em diretorio com
+    todas as linhas do corpus.
+    """
+    coletor = RSSNewsCollector()
+    analisador = SentimentAnalyzer()
+    df = gerar_dataframe(min(tamanho, LIMITE_LINHAS_MEMORIA))
+    itens_xml = min(len(df), LIMITE_ITENS_XML)
+    xml = gerar_xml_rss(df.head(itens_xml))
+    textos = analisador.analyze_dataframe(df.copy())['full_text'].tolist()
+    linhas = len(df)
+
+    resultado = {
+        'parsing_xml': (itens_xml, lambda: sum(1 for _ in coletor.iterar_itens_rss(io.BytesIO(xml), 'benchmark'))),
+        'analyze_dataframe': (linhas, lambda: analisador.analyze_dataframe(df.copy())),
+        'extrair_palavras_chave': (linhas, lambda: analisador.extrair_palavras_chave(textos)),
+    }
+
+    # O dashboard depende do Streamlit; sem ele os casos de interface são omitidos
+    try:
+        import dashboard
+    except ImportError:
+        return resultado
+
+    # Mesmas consultas que o dashboard faz ao armazenamento a cada combinação de filtros
+    store = NewsStore(os.path.join(diretorio, 'benchmark.db'))
+    preencher_store(store, analisador, tamanho)
+    cubo = store.consultar_agregados(**FILTROS_DASHBOARD)
+
+    resultado.update({
+        'dashboard_contar': (tamanho, lambda: store.contar(**FILTROS_DASHBOARD)),
+        'dashboard_pagina': (tamanho, lambda: store.consultar(
+            colunas=dashboard.COLUNAS_TABELA, limite=dashboard.TAMANHO_PAGINA, **FILTROS_DASHBOARD
+        )),
+        'dashboard_cubo': (tamanho, lambda: store.consultar_agregados(**FILTROS_DASHBOARD)),
+        'dashboard_contar_por_dia': (tamanho, lambda: dashboard.contar_por_dia(cubo)),
+        'dashboard_grafico_sentimentos': (tamanho, lambda: dashboard.create_sentiment_chart(
+            dashboard.somar_cubo(cubo, 'sentiment')
+        )),
+    })
+    return resultado
+
+
+def ambiente():
+    """Identificação da máquina e do código medidos"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'momento': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def executar(tamanhos, repeticoes, selecionados=None):
+    resultados = []
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            for nome, (linhas, funcao) in casos(tamanho, diretorio).items():
+                if selecionados and nome not in selecionados:
+                    continue
+                tempos = cronometrar(funcao, repeticoes)
+                melhor = min(tempos)
+                resultados.append({
+                    'caso': nome,
+                    'tamanho_corpus': tamanho,
+                    'linhas': linhas,
+                    'repeticoes': repeticoes,
+                    'melhor_s': melhor,
+                    'mediana_s': statistics.median(tempos),
+                    'linhas_por_s': linhas / melhor if melhor else None,
+                })
+                print(f"{nome:32} {linhas:>10,} linhas  {melhor:9.4f} s  {linhas / melhor:>14,.0f} linhas/s",
+                      file=sys.stderr)
+    return resultados
+
+
+def comparar(atuais, anteriores, tolerancia):
+    """Casos que ficaram mais lentos que a referência além da tolerância (fração)"""
+    referencia = {(r['caso'], r['tamanho_corpus']): r['melhor_s'] for r in anteriores}
+    regressoes = []
+    for resultado in atuais:
+        anterior = referencia.get((resultado['caso'], resultado['tamanho_corpus']))
+        if anterior and resultado['melhor_s'] > anterior * (1 + tolerancia):
+            regressoes.append({**resultado, 'referencia_s': anterior,
+                               'variacao': resultado['melhor_s'] / anterior - 1})
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', default='1000,10000,100000',
+                        help='quantidades de linhas separadas por vírgula (ex.: 1000,1000000,10000000)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--casos', help='nomes dos casos separados por vírgula (padrão: todos)')
+    parser.add_argument('--saida', help='arquivo JSON de resultados (padrão: saída padrão)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior usado como referência')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='fração de lentidão aceita antes de acusar regressão')
+    args = parser.parse_args()
+
+    tamanhos = [int(valor) for valor in args.tamanhos.split(',')]
+    selecionados = set(args.casos.split(',')) if args.casos else None
+    relatorio = {'ambiente': ambiente(), 'resultados': executar(tamanhos, args.repeticoes, selecionados)}
+
+    codigo_saida = 0
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anteriores = json.load(f)['resultados']
+        relatorio['regressoes'] = comparar(relatorio['resultados'], anteriores, args.tolerancia)
+        for regressao in relatorio['regressoes']:
+            print(f"REGRESSÃO {regressao['caso']} ({regressao['linhas']:,} linhas): "
+                  f"{regressao['variacao']:+.0%}", file=sys.stderr)
+        codigo_saida = 1 if relatorio['regressoes'] else 0
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    sys.exit(codigo_saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class FeedCache:
+    """Cache em disco dos feeds RSS, com validação condicional (ETag/Last-Modified)
+
+    Cada entrada guarda os validadores HTTP e as notícias já processadas; o
+    XML não é guardado, porque a leitura para depois de max_resultados itens
+    e o corpo lido seria só uma parte do feed.
+    """
+
+    def __init__(self, diretorio='.cache_feeds', ttl=600, max_bytes=50 * 1024 * 1024):
+        self.diretorio = diretorio
+        # Tempo (em segundos) durante o qual uma entrada é usada sem consultar o servidor
+        self.ttl = ttl
+        # Tamanho máximo ocupado em disco antes de remover as entradas menos usadas
+        self.max_bytes = max_bytes
+        self._trava = threading.Lock()
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, url):
+        """Retorna o caminho do arquivo da entrada de uma URL"""
+        chave = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.diretorio, chave + '.json')
+
+    def _gravar_atomico(self, caminho, conteudo):
+        """Grava o arquivo por substituição para nunca deixar entradas pela metade"""
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+
+    def obter(self, url):
+        """Retorna a entrada armazenada para a URL ou None"""
+        caminho_meta = self._caminho(url)
+        try:
+            with open(caminho_meta, encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Marca o acesso para a política de remoção (menos recentemente usado)
+        try:
+            os.utime(caminho_meta)
+        except OSError:
+            pass
+        return entrada
+
+    def esta_fresca(self, entrada):
+        """Indica se a entrada ainda está dentro do TTL"""
+        return time.time() - entrada.get('validado_em', 0) < self.ttl
+
+    def cabecalhos_condicionais(self, entrada):
+        """Monta os cabeçalhos If-None-Match/If-Modified-Since da entrada"""
+        cabecalhos = {}
+        if entrada.get('etag'):
+            cabecalhos['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            cabecalhos['If-Modified-Since'] = entrada['last_modified']
+        return cabecalhos
+
+    def salvar(self, url, cabecalhos, noticias, max_resultados):
+        """Armazena os validadores HTTP e as notícias já processadas"""
+        caminho_meta = self._caminho(url)
+        entrada = {
+            'url': url,
+            'etag': cabecalhos.get('ETag'),
+            'last_modified': cabecalhos.get('Last-Modified'),
+            'validado_em': time.time(),
+            'max_resultados': max_resultados,
+            'noticias': noticias
+        }
+
+        with self._trava:
+            self._gravar_atomico(caminho_meta, json.dumps(entrada, ensure_ascii=False).encode('utf-8'))
+            self._remover_excesso()
+
+    def renovar(self, url, entrada):
+        """Renova a validade de uma entrada confirmada pelo servidor (HTTP 304)"""
+        caminho_meta = self._caminho(url)
+        entrada['validado_em'] = time.time()
+        with self._trava:
+            self._gravar_atomico(caminho_meta, json.dumps(entrada, ensure_ascii=False).encode('utf-8'))
+
+    def _remover_excesso(self):
+        """Remove as entradas menos usadas até o cache caber em max_bytes"""
+        entradas = {}
+        total = 0
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith('.tmp'):
+                continue
+            try:
+                info = os.stat(os.path.join(self.diretorio, nome))
+            except OSError:
+                continue
+            entradas[nome] = (info.st_size, info.st_mtime)
+            total += info.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for nome, (tamanho, _) in sorted(entradas.items(), key=lambda item: item[1][1]):
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except OSError:
+                pass
+            total -= tamanho
+            if total <= self.max_bytes:
+                break
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._trava:
+            for nome in os.listdir(self.diretorio):
+                try:
+                    os.remove(os.path.join(self.diretorio, nome))
+                except OSError:
+                    pass
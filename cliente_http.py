@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitoAberto(requests.RequestException):
+    """O host acumulou falhas seguidas e está temporariamente sem requisições"""
+
+
+class ClienteHTTP:
+    """Cliente HTTP do coletor: sessão com pool de conexões, novas tentativas e disjuntor por host
+
+    Respostas 429/5xx e erros de conexão são repetidos com espera exponencial
+    limitada (ou a indicada em Retry-After). Depois de limite_falhas falhas
+    seguidas o circuito do host abre e as requisições falham na hora durante
+    tempo_aberto segundos; passado esse tempo, uma requisição de teste decide
+    se o circuito fecha ou abre de novo.
+    """
+
+    def __init__(self, headers=None, timeout_conexao=3.05, timeout_leitura=10, tentativas=3, backoff_base=0.5,
+                 backoff_max=30, status_repetir=(429, 500, 502, 503, 504), limite_falhas=5, tempo_aberto=60,
+                 tamanho_pool=8, limite_por_host=4):
+        self.headers = dict(headers or {})
+        # Tempos limite separados: estabelecer a conexão e aguardar cada leitura
+        self.timeout = (timeout_conexao, timeout_leitura)
+        # Total de tentativas por requisição (a primeira incluída)
+        self.tentativas = tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.status_repetir = frozenset(status_repetir)
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.limite_por_host = limite_por_host
+
+        # Sessão compartilhada entre as threads: conexões mantidas vivas e reaproveitadas
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool)
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+
+        # Por host: semáforo de concorrência e estado do disjuntor
+        self._semaforos_host = {}
+        self._circuitos = {}
+        self._trava = threading.Lock()
+
+    def _semaforo_host(self, host):
+        """Retorna o semáforo que limita a concorrência para o host"""
+        with self._trava:
+            if host not in self._semaforos_host:
+                self._semaforos_host[host] = threading.BoundedSemaphore(self.limite_por_host)
+            return self._semaforos_host[host]
+
+    def _liberar_circuito(self, host):
+        """Falha na hora se o circuito do host estiver aberto"""
+        with self._trava:
+            circuito = self._circuitos.setdefault(host, {'falhas': 0, 'aberto_ate': 0.0, 'em_teste': False})
+            agora = time.monotonic()
+            if circuito['aberto_ate'] > agora:
+                raise CircuitoAberto(f"Circuito aberto para {host} por mais {circuito['aberto_ate'] - agora:.1f}s")
+            if circuito['falhas'] >= self.limite_falhas:
+                # Meio aberto: só uma requisição de teste por vez
+                if circuito['em_teste']:
+                    raise CircuitoAberto(f"Circuito de {host} em teste")
+                circuito['em_teste'] = True
+
+    def _registrar_resultado(self, host, sucesso, bloquear_por=0):
+        """Atualiza o disjuntor do host com o resultado de uma tentativa"""
+        with self._trava:
+            circuito = self._circuitos[host]
+            circuito['em_teste'] = False
+            if sucesso:
+                circuito['falhas'] = 0
+                return
+            circuito['falhas'] += 1
+            espera = max(bloquear_por, self.tempo_aberto if circuito['falhas'] >= self.limite_falhas else 0)
+            if espera:
+                circuito['aberto_ate'] = max(circuito['aberto_ate'], time.monotonic() + espera)
+
+    def _retry_after(self, resposta):
+        """Segundos pedidos pelo servidor no cabeçalho Retry-After (None se ausente)"""
+        valor = resposta.headers.get('Retry-After') if resposta is not None else None
+        if not valor:
+            return None
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _espera(self, tentativa):
+        """Espera exponencial limitada, com variação aleatória entre metade e o total"""
+        espera = min(self.backoff_base * 2 ** tentativa, self.backoff_max)
+        return random.uniform(espera / 2, espera)
+
+    @contextmanager
+    def get(self, url, headers=None, stream=True):
+        """Faz um GET com novas tentativas; a resposta é fechada ao final do bloco
+
+        Retorna a última resposta recebida, mesmo com status de erro (cabe a
+        quem chama usar raise_for_status). Levanta CircuitoAberto ou o erro de
+        conexão da última tentativa.
+        """
+        host = urlsplit(url).netloc
+        cabecalhos = {**self.headers, **(headers or {})}
+
+        for tentativa in range(self.tentativas):
+            self._liberar_circuito(host)
+            ultima = tentativa == self.tentativas - 1
+            semaforo = self._semaforo_host(host)
+            semaforo.acquire()
+            try:
+                resposta = self.session.get(url, headers=cabecalhos, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                semaforo.release()
+                self._registrar_resultado(host, False)
+                if ultima:
+                    raise
+                time.sleep(self._espera(tentativa))
+                continue
+            except Exception:
+                # Erro da própria requisição (URL inválida etc.): não conta contra o host
+                semaforo.release()
+                with self._trava:
+                    self._circuitos[host]['em_teste'] = False
+                raise
+
+            if resposta.status_code not in self.status_repetir:
+                self._registrar_resultado(host, True)
+                try:
+                    yield resposta
+                finally:
+                    resposta.close()
+                    semaforo.release()
+                return
+
+            retry_after = self._retry_after(resposta)
+            # Um Retry-After maior que a espera máxima vale para o host todo
+            longo = retry_after is not None and retry_after > self.backoff_max
+            self._registrar_resultado(host, False, bloquear_por=retry_after if longo else 0)
+            if ultima or longo:
+                try:
+                    yield resposta
+                finally:
+                    resposta.close()
+                    semaforo.release()
+                return
+
+            resposta.close()
+            semaforo.release()
+            time.sleep(retry_after if retry_after is not None else self._espera(tentativa))
@@ -1,20 +1,95 @@
-import requests
 import xml.etree.ElementTree as ET
 import pandas as pd
 import re
+import sys
+from collections.abc import Mapping
 from datetime import datetime
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote
+from armazenamento import NewsStore, converter_data_publicacao, converter_datas_publicacao, para_timestamp_utc, tipar_noticias
+from cliente_http import ClienteHTTP
+from metricas import metricas
+
+# lxml, quando disponível, é usado como backend mais rápido do parsing incremental
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+
+class Noticia(Mapping):
+    """Notícia coletada, com os campos em __slots__ (sem um dicionário por registro)
+
+    Continua lida como um dicionário (noticia['title'], get, dict(noticia),
+    pd.DataFrame), então serve onde os registros do coletor já eram usados.
+    search_term e collected_at são os mesmos objetos de texto em todas as
+    notícias de um feed, em vez de uma cópia por registro.
+    """
+
+    __slots__ = ('title', 'link', 'description', 'pub_date', 'published', 'search_term', 'collected_at')
+
+    def __init__(self, title="", link="", description="", pub_date="", published=None, search_term="",
+                 collected_at=""):
+        self.title = title
+        self.link = link
+        self.description = description
+        self.pub_date = pub_date
+        self.published = published
+        self.search_term = sys.intern(search_term) if isinstance(search_term, str) else search_term
+        self.collected_at = collected_at
+
+    @classmethod
+    def de_registro(cls, registro):
+        """Converte um dicionário de notícia (ex.: do cache de feeds) em Noticia"""
+        return cls(**{campo: registro[campo] for campo in cls.__slots__ if campo in registro})
+
+    def __getitem__(self, campo):
+        if campo not in self.__slots__:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"Noticia({dict(self)!r})"
+
 
 class RSSNewsCollector:
-    def __init__(self):
-        self.base_url = "https://news.google.com/rss/search"
+    def __init__(self, base_url="https://news.google.com/rss/search", max_workers=8, limite_por_host=4, cache=None,
+                 deduplicador=None, cliente=None):
+        self.base_url = base_url
+        # Cache opcional dos feeds (FeedCache) para requisições condicionais
+        self.cache = cache
+        # Detector opcional de quase duplicatas (DetectorDuplicatas) contra o histórico
+        self.deduplicador = deduplicador
         self.termos_busca = [
             "Inteligência Artificial Piauí",
             "IA Piauí", 
             "SIA Piauí",
             "Artificial Intelligence Piauí"
         ]
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        
+        # Configuração da coleta concorrente
+        self.max_workers = max_workers
+        
+        # Cliente HTTP compartilhado entre todos os termos (pool de conexões, novas
+        # tentativas e disjuntor por host)
+        self.cliente = cliente or ClienteHTTP(
+            headers=self.headers, tamanho_pool=max_workers, limite_por_host=limite_por_host
+        )
+    
+    def montar_url(self, termo_busca):
+        """Monta a URL de busca do feed RSS para um termo"""
+        termo_codificado = quote(termo_busca)
+        return f"{self.base_url}?q={termo_codificado}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
         
     def limpar_texto(self, texto):
         """Remove tags HTML e caracteres desnecessários"""
@@ -29,68 +104,183 @@ class RSSNewsCollector:
         texto_limpo = re.sub(r'\s+', ' ', texto_limpo).strip()
         return texto_limpo
     
-    def buscar_noticias_rss(self, termo_busca, max_resultados=5):
-        """Busca notícias no feed RSS do Google News"""
-        try:
-            termo_codificado = quote(termo_busca)
-            url = f"{self.base_url}?q={termo_codificado}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
+    def limpar_titulo(self, titulo):
+        """Limpa o título mantendo o separador do veículo ("Manchete - Veículo" no Google Notícias)
+        
+        limpar_texto troca o hífen por espaço; sem o separador o detector de
+        quase duplicatas não reconheceria o sufixo do veículo nas cópias
+        republicadas da mesma matéria.
+        """
+        partes = (self.limpar_texto(parte) for parte in (titulo or "").rsplit(' - ', 1))
+        return ' - '.join(parte for parte in partes if parte)
+    
+    def _extrair_noticia(self, item, termo_busca, coletada_em):
+        """Converte um elemento <item> do feed na Noticia"""
+        titulo = item.find('title')
+        link = item.find('link') 
+        descricao = item.find('description')
+        data_pub = item.find('pubDate')
+        
+        with metricas.cronometrar('limpeza_texto'):
+            titulo_limpo = self.limpar_titulo(titulo.text if titulo is not None else "")
+            descricao_limpa = self.limpar_texto(descricao.text if descricao is not None else "")
+        
+        pub_date = data_pub.text if data_pub is not None else ""
+        return Noticia(
+            title=titulo_limpo,
+            link=link.text if link is not None else "",
+            description=descricao_limpa,
+            pub_date=pub_date,
+            # Data já convertida uma única vez para ISO 8601 em UTC
+            published=converter_data_publicacao(pub_date),
+            search_term=termo_busca,
+            collected_at=coletada_em
+        )
+    
+    def iterar_itens_rss(self, fluxo, termo_busca, max_resultados=None):
+        """Lê o feed de forma incremental, entregando uma notícia por vez (todas, se max_resultados for None)"""
+        if max_resultados is not None and max_resultados <= 0:
+            return
+        
+        if lxml_etree is not None:
+            eventos = lxml_etree.iterparse(fluxo, events=('end',), tag='item')
+        else:
+            eventos = ET.iterparse(fluxo, events=('start', 'end'))
+        
+        canal = None
+        encontrados = 0
+        # Um único horário de coleta por feed, compartilhado pelas notícias
+        termo_busca = sys.intern(termo_busca)
+        coletada_em = datetime.now().isoformat()
+        for evento, elemento in eventos:
+            if evento == 'start':
+                if elemento.tag == 'channel':
+                    canal = elemento
+                continue
+            if elemento.tag != 'item':
+                continue
             
-            resposta = requests.get(url, headers=headers, timeout=10)
-            resposta.raise_for_status()
+            yield self._extrair_noticia(elemento, termo_busca, coletada_em)
             
-            # Processa o XML retornado
-            root = ET.fromstring(resposta.content)
+            # Libera o elemento já processado para manter a memória constante
+            elemento.clear()
+            if lxml_etree is not None:
+                while elemento.getprevious() is not None:
+                    del elemento.getparent()[0]
+            elif canal is not None:
+                canal.remove(elemento)
             
-            noticias = []
-            items = root.findall('.//item')[:max_resultados]
+            encontrados += 1
+            if max_resultados is not None and encontrados >= max_resultados:
+                break
+    
+    def buscar_feed(self, termo_busca, max_resultados=None):
+        """Busca as notícias de um termo, propagando erros de rede e de parsing"""
+        url = self.montar_url(termo_busca)
+        headers = {}
+        
+        # Usa o cache quando a entrada cobre a quantidade pedida
+        entrada = self.cache.obter(url) if self.cache else None
+        if entrada and entrada['max_resultados'] is not None and (
+            max_resultados is None or entrada['max_resultados'] < max_resultados
+        ):
+            entrada = None
+        if entrada:
+            if self.cache.esta_fresca(entrada):
+                metricas.incrementar('feeds_cache_fresco')
+                return [Noticia.de_registro(noticia) for noticia in entrada['noticias'][:max_resultados]]
+            headers.update(self.cache.cabecalhos_condicionais(entrada))
+        
+        with metricas.cronometrar('requisicao_feed'), self.cliente.get(url, headers=headers) as resposta:
+            # Feed não mudou desde a última coleta: dispensa download e parsing
+            if resposta.status_code == 304 and entrada:
+                metricas.incrementar('feeds_nao_modificados')
+                self.cache.renovar(url, entrada)
+                return [Noticia.de_registro(noticia) for noticia in entrada['noticias'][:max_resultados]]
+            resposta.raise_for_status()
             
-            for item in items:
-                titulo = item.find('title')
-                link = item.find('link') 
-                descricao = item.find('description')
-                data_pub = item.find('pubDate')
-                
-                noticia = {
-                    'title': self.limpar_texto(titulo.text if titulo is not None else ""),
-                    'link': link.text if link is not None else "",
-                    'description': self.limpar_texto(descricao.text if descricao is not None else ""),
-                    'pub_date': data_pub.text if data_pub is not None else "",
-                    'search_term': termo_busca,
-                    'collected_at': datetime.now().isoformat()
-                }
-                noticias.append(noticia)
-                
-            return noticias
+            # Processa o XML à medida que chega, parando de ler após max_resultados itens
+            # (a leitura da rede acontece junto com o parsing, então são medidos juntos)
+            resposta.raw.decode_content = True
+            with metricas.cronometrar('leitura_xml'):
+                noticias = list(self.iterar_itens_rss(resposta.raw, termo_busca, max_resultados))
+        
+        metricas.incrementar('feeds_baixados')
+        metricas.incrementar('noticias_coletadas', len(noticias))
+        
+        if self.cache:
+            self.cache.salvar(url, resposta.headers, [dict(noticia) for noticia in noticias], max_resultados)
             
+        return noticias
+    
+    def buscar_noticias_rss(self, termo_busca, max_resultados=None):
+        """Busca notícias no feed RSS do Google News"""
+        try:
+            return self.buscar_feed(termo_busca, max_resultados)
         except Exception as e:
+            metricas.incrementar('erros_coleta')
             print(f"Erro ao buscar notícias para '{termo_busca}': {e}")
             return []
     
-    def coletar_todas_noticias(self):
+    def coletar_noticias_concorrente(self, termos=None, max_resultados=None):
+        """Busca os termos em paralelo, entregando (termo, notícias) à medida que cada um termina"""
+        termos = self.termos_busca if termos is None else termos
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futuros = {
+                executor.submit(self.buscar_noticias_rss, termo, max_resultados): termo
+                for termo in termos
+            }
+            for futuro in as_completed(futuros):
+                yield futuros[futuro], futuro.result()
+    
+    def coletar_todas_noticias(self, concorrente=False):
         """Busca notícias para todos os termos configurados"""
         todas_noticias = []
         
-        for termo in self.termos_busca:
-            print(f"Buscando notícias para: {termo}")
-            noticias = self.buscar_noticias_rss(termo)
-            todas_noticias.extend(noticias)
+        if concorrente:
+            for termo, noticias in self.coletar_noticias_concorrente():
+                print(f"Concluída a busca para: {termo} ({len(noticias)} notícias)")
+                todas_noticias.extend(noticias)
+        else:
+            for termo in self.termos_busca:
+                print(f"Buscando notícias para: {termo}")
+                noticias = self.buscar_noticias_rss(termo)
+                todas_noticias.extend(noticias)
         
-        # Remove duplicatas baseadas no título
+        return self.remover_duplicatas(todas_noticias)
+    
+    def remover_duplicatas(self, todas_noticias):
+        """Remove duplicatas baseadas no título"""
         titulos_vistos = set()
         noticias_unicas = []
         
-        for noticia in todas_noticias:
-            titulo_normalizado = noticia['title'].lower()
-            if titulo_normalizado not in titulos_vistos and titulo_normalizado:
-                titulos_vistos.add(titulo_normalizado)
-                noticias_unicas.append(noticia)
+        with metricas.cronometrar('deduplicacao'):
+            for noticia in todas_noticias:
+                titulo_normalizado = noticia['title'].lower()
+                if titulo_normalizado not in titulos_vistos and titulo_normalizado:
+                    titulos_vistos.add(titulo_normalizado)
+                    noticias_unicas.append(noticia)
+            
+            # Descarta a mesma matéria republicada com título levemente diferente
+            if self.deduplicador:
+                noticias_unicas = self.deduplicador.remover_quase_duplicatas(noticias_unicas)
+        
+        metricas.incrementar('noticias_duplicadas', len(todas_noticias) - len(noticias_unicas))
+        return noticias_unicas
+    
+    def para_dataframe(self, news_data):
+        """Monta o DataFrame das notícias já no esquema compacto (datas tipadas, termo categórico)"""
+        columns = list(Noticia.__slots__)
+        # Lê os campos direto dos registros; os que faltarem (caches antigos) ficam vazios
+        df = pd.DataFrame([[noticia.get(col, "") for col in columns] for noticia in news_data], columns=columns)
         
-        # Limita o número de notícias para não sobrecarregar
-        return noticias_unicas[:15]
+        # Data de publicação tipada (UTC); notícias vindas de caches antigos são convertidas aqui
+        sem_data = df['published'].isna() | (df['published'] == "")
+        df['published'] = para_timestamp_utc(df['published'].where(~sem_data))
+        if sem_data.any():
+            df.loc[sem_data, 'published'] = converter_datas_publicacao(df.loc[sem_data, 'pub_date'])
+        return tipar_noticias(df)
     
     def save_to_csv(self, news_data, filename='noticias_ia_piaui.csv'):
         """Salva os dados coletados em CSV com separador correto"""
@@ -98,19 +288,11 @@ class RSSNewsCollector:
             print("Nenhum dado para salvar")
             return
             
-        df = pd.DataFrame(news_data)
-        
-        # Garante que todas as colunas estão presentes
-        columns = ['title', 'link', 'description', 'pub_date', 'search_term', 'collected_at']
-        for col in columns:
-            if col not in df.columns:
-                df[col] = ""
-        
-        # Reordena as colunas
-        df = df[columns]
+        df = self.para_dataframe(news_data)
         
         # Salva com separador correto e codificação UTF-8
-        df.to_csv(filename, index=False, encoding='utf-8-sig', sep=',', quotechar='"', quoting=1)
+        with metricas.cronometrar('gravacao_csv'):
+            df.to_csv(filename, index=False, encoding='utf-8-sig', sep=',', quotechar='"', quoting=1)
         print(f"Dados salvos em {filename} ({len(df)} registros)")
         
         # Mostra preview dos primeiros registros
@@ -120,7 +302,7 @@ class RSSNewsCollector:
     def save_to_json(self, news_data, filename='noticias_ia_piaui.json'):
         """Salva os dados coletados em JSON"""
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(news_data, f, ensure_ascii=False, indent=2)
+            json.dump([dict(noticia) for noticia in news_data], f, ensure_ascii=False, indent=2)
         print(f"Dados salvos em {filename}")
 
 if __name__ == "__main__":
@@ -132,9 +314,15 @@ if __name__ == "__main__":
         coletor.save_to_csv(dados_noticias)
         coletor.save_to_json(dados_noticias)
         
+        # Mantém o histórico completo no armazenamento persistente
+        novas = NewsStore().upsert_noticias(dados_noticias)
+        print(f"{len(novas)} notícias novas adicionadas ao histórico")
+        
         # Mostra prévia dos dados
-        df = pd.DataFrame(dados_noticias)
+        df = coletor.para_dataframe(dados_noticias)
         print("\nPrévia das notícias coletadas:")
         print(df[['title', 'search_term']].head())
     else:
-        print("Nenhuma notícia foi encontrada.")
\ No newline at end of file
+        print("Nenhuma notícia foi encontrada.")
+    
+    metricas.exportar()
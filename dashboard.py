@@ -2,15 +2,23 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import functools
 import os
+import tempfile
 
 # Importa os módulos locais
 try:
-    from coletor_rss import RSSNewsCollector
-    from analise_sentimento import SentimentAnalyzer, processar_sentimentos
+    from analise_sentimento import processar_sentimentos
+    from armazenamento import (
+        NewsStore, ARQUIVO_SNAPSHOT, ESQUEMA_SNAPSHOT, carregar_snapshot,
+        versao_snapshot, arquivo_ponteiro_snapshot, tipar_noticias
+    )
+    from indice_palavras import IndiceFrequencias
+    from nuvem_palavras import CacheNuvens, FalhaNuvem
+    from retencao import RetencaoHistorico
+    from servico_coleta import ServicoColeta
+    from metricas import metricas
 except ImportError as e:
     import streamlit as st
     st.error(f"Erro ao importar módulos: {e}")
@@ -145,45 +153,53 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Colunas usadas pelo dashboard (a descrição já está contida em full_text)
+COLUNAS_DASHBOARD = ['title', 'link', 'pub_date', 'published', 'search_term', 'collected_at', 'full_text', 'sentiment']
+
+# Modo compartilhado (MONITOR_DADOS_COMPARTILHADOS=1): um único processo carregador
+# (servico_coleta.py) coleta e publica o snapshot; cada processo do dashboard
+# só mapeia a versão publicada, sem coletar nem regravar dados
+DADOS_COMPARTILHADOS = os.environ.get('MONITOR_DADOS_COMPARTILHADOS') == '1'
+
+# Colunas e tamanho de página da tabela de notícias
+COLUNAS_TABELA = ['title', 'sentiment', 'search_term', 'pub_date']
+TAMANHO_PAGINA = 50
+
+def abrir_store():
+    """Armazenamento usado nas consultas; no modo compartilhado, somente leitura (sem DDL nem migrações)"""
+    return NewsStore(somente_leitura=DADOS_COMPARTILHADOS)
+
 def load_data():
     """Carrega dados das notícias analisadas"""
-    if os.path.exists('noticias_com_sentimento.csv'):
-        try:
-            return pd.read_csv('noticias_com_sentimento.csv', encoding='utf-8-sig', sep=',')
-        except:
-            return pd.read_csv('noticias_com_sentimento.csv', encoding='utf-8')
-    elif os.path.exists('noticias_ia_piaui.csv'):
-        # Se não existe arquivo com sentimento, processa
-        df, _ = processar_sentimentos()
+    # Segue o ponteiro .atual do snapshot: a versão publicada só é relida do disco quando o ponteiro muda
+    df = carregar_snapshot(ARQUIVO_SNAPSHOT, COLUNAS_DASHBOARD)
+    if df is not None:
         return df
-    else:
-        return pd.DataFrame()
+    if DADOS_COMPARTILHADOS:
+        # O carregador ainda não publicou a primeira versão
+        return tipar_noticias(pd.DataFrame(columns=COLUNAS_DASHBOARD))
+    
+    store = NewsStore()
+    if store.contar() == 0:
+        # Migra os CSVs legados para o armazenamento na primeira execução
+        if os.path.exists('noticias_com_sentimento.csv'):
+            store.importar_csv('noticias_com_sentimento.csv')
+        elif os.path.exists('noticias_ia_piaui.csv'):
+            # Se não existe arquivo com sentimento, processa
+            df, _ = processar_sentimentos()
+            store.upsert_noticias(df.to_dict('records'))
+    
+    if store.exportar_snapshot():
+        return carregar_snapshot(ARQUIVO_SNAPSHOT, COLUNAS_DASHBOARD)
+    # Mesma ordem do snapshot (published crescente)
+    df = store.consultar(colunas=COLUNAS_DASHBOARD)
+    return df.sort_values('published', kind='stable', na_position='first', ignore_index=True)
 
-def collect_fresh_data():
-    """Coleta notícias atualizadas"""
-    with st.spinner("Buscando notícias..."):
-        collector = RSSNewsCollector()
-        news_data = collector.coletar_todas_noticias()
-        
-        if news_data:
-            collector.save_to_csv(news_data)
-            
-            analyzer = SentimentAnalyzer()
-            df = pd.DataFrame(news_data)
-            df_processed = analyzer.analyze_dataframe(df)
-            df_processed.to_csv('noticias_com_sentimento.csv', index=False, encoding='utf-8-sig', sep=',', quotechar='"', quoting=1)
-            
-            return df_processed
-        else:
-            return pd.DataFrame()
-
-def create_sentiment_chart(df):
-    """Cria gráfico de distribuição de sentimentos"""
-    if df.empty:
+def create_sentiment_chart(sentiment_counts):
+    """Cria gráfico de distribuição de sentimentos a partir da contagem por sentimento"""
+    if sentiment_counts.empty:
         return go.Figure()
     
-    sentiment_counts = df['sentiment'].value_counts()
-    
     colors = {
         'positivo': '#27AE60',
         'negativo': '#E74C3C', 
@@ -215,51 +231,182 @@ def create_sentiment_chart(df):
     
     return fig
 
-def generate_wordcloud(text_data):
-    """Gera nuvem de palavras das notícias"""
-    if not text_data:
-        return None
-    
-    combined_text = ' '.join([str(text) for text in text_data if pd.notna(text)])
-    
-    if not combined_text.strip():
-        return None
-    
-    wordcloud = WordCloud(
-        width=800, 
-        height=400,
-        background_color='white',
-        max_words=50,
-        colormap='plasma',
-        relative_scaling=0.6,
-        min_font_size=10
-    ).generate(combined_text)
-    
-    return wordcloud
-
-def apply_date_filter(df, dias_filtro):
-    """Aplica filtro de data ao dataframe"""
-    if dias_filtro == "Todas":
-        return df
-    
-    try:
-        dias = int(dias_filtro.split()[0])
-        data_limite = datetime.now() - timedelta(days=dias)
-        
-        # Converte coluna de data se necessário
-        if 'published' in df.columns:
-            df_filtered = df.copy()
-            df_filtered['published'] = pd.to_datetime(df_filtered['published'], errors='coerce')
-            return df_filtered[df_filtered['published'] >= data_limite]
-        elif 'pub_date' in df.columns:
-            df_filtered = df.copy()
-            df_filtered['pub_date'] = pd.to_datetime(df_filtered['pub_date'], errors='coerce')
-            return df_filtered[df_filtered['pub_date'] >= data_limite]
+# Parâmetros do cache de dados e figuras derivadas
+CACHE_TTL = 600
+CACHE_MAX_ENTRADAS = 64
+
+@st.cache_resource
+def _estatisticas_cache():
+    """Contadores de consultas e faltas do cache, compartilhados entre sessões"""
+    return {'consultas': 0, 'faltas': 0}
+
+def _registrar_falta():
+    _estatisticas_cache()['faltas'] += 1
+
+def com_estatisticas(funcao_cacheada):
+    """Contabiliza as consultas feitas a uma função cacheada"""
+    @functools.wraps(funcao_cacheada)
+    def envolvida(*args, **kwargs):
+        _estatisticas_cache()['consultas'] += 1
+        return funcao_cacheada(*args, **kwargs)
+    envolvida.clear = funcao_cacheada.clear
+    return envolvida
+
+def filtros_consulta(filtros):
+    """Converte a tupla de filtros da interface nos parâmetros de consulta do armazenamento"""
+    sentimento_filtro, termo_filtro, dias_filtro = filtros
+    consulta = {}
+    if sentimento_filtro != "Todas":
+        consulta['sentimento'] = sentimento_filtro
+    if termo_filtro != "Todos":
+        consulta['termo'] = termo_filtro
+    if dias_filtro != "Todas":
+        consulta['inicio'] = datetime.now(timezone.utc) - timedelta(days=int(dias_filtro.split()[0]))
+    return consulta
+
+def versao_dados():
+    """Versão dos dados: a versão publicada do snapshot (muda a cada coleta)"""
+    return versao_snapshot(ARQUIVO_SNAPSHOT)
+
+@com_estatisticas
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_opcoes_filtros(versao):
+    """Valores disponíveis para os filtros de sentimento e termo"""
+    _registrar_falta()
+    df = load_data()
+    sentimentos = list(df['sentiment'].dropna().unique()) if 'sentiment' in df.columns else []
+    termos = list(df['search_term'].dropna().unique()) if 'search_term' in df.columns else []
+    return sentimentos, termos
+
+@com_estatisticas
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_total_filtrado(versao, filtros):
+    """Quantidade de notícias que atendem aos filtros"""
+    _registrar_falta()
+    return abrir_store().contar(**filtros_consulta(filtros))
+
+@com_estatisticas
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_pagina(versao, filtros, pagina):
+    """Uma página da tabela de notícias, lida direto do armazenamento (mais recentes primeiro)"""
+    _registrar_falta()
+    return abrir_store().consultar(
+        colunas=COLUNAS_TABELA, limite=TAMANHO_PAGINA, deslocamento=(pagina - 1) * TAMANHO_PAGINA,
+        **filtros_consulta(filtros)
+    )
+
+def exportar_noticias(filtros, formato):
+    """Conteúdo do arquivo de exportação, gerado só quando o download é pedido
+    
+    As notícias são lidas do armazenamento em lotes e gravadas num arquivo
+    temporário, sem montar o resultado filtrado inteiro em um DataFrame.
+    """
+    store = abrir_store()
+    with tempfile.TemporaryFile() as destino:
+        if formato == 'parquet':
+            store.exportar_parquet(destino, **filtros_consulta(filtros))
         else:
-            return df
-    except Exception as e:
-        st.warning(f"Erro ao aplicar filtro de data: {e}")
-        return df
+            store.exportar_csv(destino, **filtros_consulta(filtros))
+        destino.seek(0)
+        return destino.read()
+
+@com_estatisticas
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_grafico_sentimentos(versao, filtros):
+    """Gráfico de sentimentos dos dados filtrados"""
+    _registrar_falta()
+    return create_sentiment_chart(somar_cubo(obter_cubo(versao, filtros), 'sentiment'))
+
+@com_estatisticas
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_frequencias_palavras(versao, filtros):
+    """Frequências das 50 palavras mais citadas nos dados filtrados, do índice de frequências"""
+    _registrar_falta()
+    # O índice é atualizado na gravação (NewsStore.upsert_noticias); aqui só os contadores são somados
+    return dict(IndiceFrequencias(abrir_store()).top_n(50, **filtros_consulta(filtros)))
+
+@st.cache_resource
+def obter_cache_nuvens():
+    """Cache de imagens das nuvens de palavras, compartilhado entre sessões"""
+    return CacheNuvens()
+
+# Intervalo (s) entre as verificações da nuvem que está sendo desenhada
+INTERVALO_NUVEM = 1
+
+@st.fragment(run_every=INTERVALO_NUVEM)
+def aguardar_nuvem_palavras(frequencias):
+    """Reexecuta só esta área até a imagem ficar pronta (ou falhar) e então atualiza a página"""
+    try:
+        pronta = obter_cache_nuvens().obter(frequencias) is not None
+    except FalhaNuvem:
+        # A página mostra o erro e esta área deixa de ser reexecutada
+        pronta = True
+    if pronta:
+        st.rerun()
+    st.info("⏳ Gerando a nuvem de palavras...")
+
+@com_estatisticas
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_dados_timeline(versao, filtros):
+    """Quantidade de notícias por dia nos dados filtrados"""
+    _registrar_falta()
+    return contar_por_dia(obter_cubo(versao, filtros))
+
+@com_estatisticas
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS)
+def obter_cubo(versao, filtros):
+    """Células (dia, termo, sentimento) -> quantidade que atendem aos filtros
+    
+    O cubo é mantido pelo armazenamento a cada gravação, então métricas e
+    gráficos custam O(células) em vez de O(notícias). O filtro de período
+    vale por dia inteiro.
+    """
+    _registrar_falta()
+    return abrir_store().consultar_agregados(**filtros_consulta(filtros))
+
+def somar_cubo(cubo, coluna):
+    """Total de notícias por valor de uma dimensão do cubo, do maior para o menor"""
+    totais = cubo.groupby(coluna, observed=True)['quantidade'].sum().sort_values(ascending=False)
+    # Notícias sem termo ou sem sentimento não viram uma fatia sem nome
+    return totais[totais.index != '']
+
+def contar_por_dia(cubo):
+    """Quantidade de notícias por dia, somando as células do cubo"""
+    timeline_data = cubo[cubo['dia'] != ''].groupby('dia')['quantidade'].sum().reset_index()
+    timeline_data.columns = ['data', 'quantidade']
+    timeline_data['data'] = pd.to_datetime(timeline_data['data'], errors='coerce').dt.date
+    return timeline_data.dropna(subset=['data'])
+
+@st.cache_resource
+def iniciar_retencao():
+    """Inicia uma única vez a compactação periódica do histórico fora da janela"""
+    retencao = RetencaoHistorico(NewsStore())
+    retencao.iniciar()
+    return retencao
+
+@st.cache_resource
+def iniciar_servico_coleta():
+    """Inicia uma única vez a coleta contínua em segundo plano; o dashboard só lê os dados"""
+    servico = ServicoColeta()
+    servico.iniciar()
+    return servico
+
+def mostrar_painel_desempenho():
+    """Tempos por etapa e contadores do pipeline na barra lateral"""
+    resumo = metricas.resumo()
+    with st.sidebar.expander("⏱️ Desempenho"):
+        if resumo['histogramas']:
+            st.dataframe(pd.DataFrame([
+                {
+                    'Etapa': nome.rsplit('_', 1)[0],
+                    'Execuções': valores['quantidade'],
+                    'Média (ms)': round(valores['media'] * 1000, 1),
+                    'p95 (ms)': None if valores['p95'] is None else valores['p95'] * 1000
+                }
+                for nome, valores in resumo['histogramas'].items()
+            ]), hide_index=True)
+        for nome, valor in resumo['contadores'].items():
+            st.caption(f"{nome.rsplit('_', 1)[0]}: {valor}")
 
 def main():
     # Header principal
@@ -273,23 +420,36 @@ def main():
     # Controles na barra lateral
     st.sidebar.markdown("### ⚙️ Controles")
     
-    # Botão de coleta
-    if st.sidebar.button("🔄 Buscar Notícias", type="primary"):
-        df = collect_fresh_data()
-        if not df.empty:
-            st.sidebar.success(f"✅ Encontradas {len(df)} notícias!")
-            st.rerun()
-        else:
-            st.sidebar.error("❌ Nenhuma notícia encontrada")
+    # A coleta roda em segundo plano; o botão só relê o snapshot mais recente
+    if st.sidebar.button("🔄 Atualizar Dados", type="primary"):
+        st.rerun()
     
-    # Carrega dados existentes
+    # Carrega dados existentes (na primeira execução, importa os CSVs legados antes que
+    # a retenção compacte o histórico e passe a recusar as notícias anteriores à janela)
     df = load_data()
+    versao = versao_dados()
+    
+    if DADOS_COMPARTILHADOS:
+        # Coleta e retenção ficam no processo carregador
+        try:
+            publicado = os.stat(arquivo_ponteiro_snapshot(ARQUIVO_SNAPSHOT)).st_mtime
+            st.sidebar.caption(f"Dados publicados em: {datetime.fromtimestamp(publicado).strftime('%d/%m/%Y %H:%M:%S')}")
+        except OSError:
+            st.sidebar.caption("Aguardando o serviço de coleta publicar os dados...")
+    else:
+        servico = iniciar_servico_coleta()
+        iniciar_retencao()
+        coletas = [estado['ultima_coleta'] for estado in servico.estado.values() if estado['ultima_coleta']]
+        if coletas:
+            st.sidebar.caption(f"Última coleta: {datetime.fromtimestamp(max(coletas)).strftime('%d/%m/%Y %H:%M:%S')}")
+        else:
+            st.sidebar.caption("Primeira coleta em andamento...")
     
     if df.empty:
         st.markdown("""
         <div class="custom-warning">
             <strong>📋 Primeiro uso?</strong><br>
-            Clique em <strong>"Buscar Notícias"</strong> na barra lateral para começar.
+            A coleta de notícias já começou em segundo plano. Clique em <strong>"Atualizar Dados"</strong> na barra lateral em alguns instantes.
         </div>
         """, unsafe_allow_html=True)
         return
@@ -298,18 +458,19 @@ def main():
     st.markdown('<div class="section-header"><h3>🔍 Filtros</h3></div>', unsafe_allow_html=True)
     
     col_filter1, col_filter2, col_filter3 = st.columns(3)
+    sentimentos_disponiveis, termos_disponiveis = obter_opcoes_filtros(versao)
     
     with col_filter1:
         sentimento_filtro = st.selectbox(
             "Filtrar por sentimento:",
-            ["Todas"] + list(df['sentiment'].unique()) if 'sentiment' in df.columns else ["Todas"]
+            ["Todas"] + sentimentos_disponiveis if 'sentiment' in df.columns else ["Todas"]
         )
     
     with col_filter2:
         if 'search_term' in df.columns:
             termo_filtro = st.selectbox(
                 "Filtrar por termo de busca:",
-                ["Todos"] + list(df['search_term'].unique())
+                ["Todos"] + termos_disponiveis
             )
         else:
             termo_filtro = "Todos"
@@ -322,83 +483,80 @@ def main():
             ["Todas", "7 dias", "15 dias", "30 dias"]
         )
     
-    # Aplicar filtros
-    df_filtrado = df.copy()
-    
-    if sentimento_filtro != "Todas" and 'sentiment' in df.columns:
-        df_filtrado = df_filtrado[df_filtrado['sentiment'] == sentimento_filtro]
-    
-    if termo_filtro != "Todos" and 'search_term' in df.columns:
-        df_filtrado = df_filtrado[df_filtrado['search_term'] == termo_filtro]
-    
-    # Aplicar filtro de data
-    df_filtrado = apply_date_filter(df_filtrado, dias_filtro)
+    # Aplicar filtros (contagens cacheadas por versão dos dados e combinação de filtros)
+    filtros = (sentimento_filtro, termo_filtro, dias_filtro)
+    total_filtrado = obter_total_filtrado(versao, filtros)
     
     # Mostrar estatísticas dos dados filtrados
-    if len(df_filtrado) != len(df):
-        st.info(f"📊 Mostrando {len(df_filtrado)} de {len(df)} notícias após aplicar filtros")
+    if total_filtrado != len(df):
+        st.info(f"📊 Mostrando {total_filtrado} de {len(df)} notícias após aplicar filtros")
     
     # Resumo dos dados
     st.markdown('<div class="section-header"><h3>📊 Resumo dos Dados</h3></div>', unsafe_allow_html=True)
     
+    # Métricas e gráficos saem do cubo (dia, termo, sentimento), não das linhas. O cubo
+    # usa os mesmos filtros por dia inteiro da tabela e conta também as notícias compactadas
+    cubo = obter_cubo(versao, filtros)
+    contagem_sentimentos = somar_cubo(cubo, 'sentiment')
+    total_cubo = int(cubo['quantidade'].sum())
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total = len(df_filtrado)
-        st.metric("Total", total)
+        st.metric("Total", total_cubo, help="Período contado por dia inteiro, incluindo as notícias já compactadas pela retenção")
     
     with col2:
-        if 'sentiment' in df_filtrado.columns:
-            positivas = len(df_filtrado[df_filtrado['sentiment'] == 'positivo'])
-            st.metric("Positivas", positivas)
-        else:
-            st.metric("Positivas", "N/A")
+        st.metric("Positivas", int(contagem_sentimentos.get('positivo', 0)))
     
     with col3:
-        if 'sentiment' in df_filtrado.columns:
-            negativas = len(df_filtrado[df_filtrado['sentiment'] == 'negativo'])
-            st.metric("Negativas", negativas)
-        else:
-            st.metric("Negativas", "N/A")
+        st.metric("Negativas", int(contagem_sentimentos.get('negativo', 0)))
     
     with col4:
-        if 'sentiment' in df_filtrado.columns:
-            neutras = len(df_filtrado[df_filtrado['sentiment'] == 'neutro'])
-            st.metric("Neutras", neutras)
-        else:
-            st.metric("Neutras", "N/A")
+        st.metric("Neutras", int(contagem_sentimentos.get('neutro', 0)))
+    
+    if total_cubo > total_filtrado:
+        st.caption(
+            f"{total_cubo - total_filtrado} notícias anteriores à janela de retenção entram nas contagens "
+            "como agregados diários, mas não aparecem na tabela"
+        )
     
     # Visualizações principais
     col_left, col_right = st.columns([1, 1])
     
     with col_left:
         st.markdown('<div class="section-header"><h3>📈 Análise de Sentimentos</h3></div>', unsafe_allow_html=True)
-        if 'sentiment' in df_filtrado.columns and not df_filtrado.empty:
-            chart = create_sentiment_chart(df_filtrado)
+        if not contagem_sentimentos.empty:
+            chart = obter_grafico_sentimentos(versao, filtros)
             st.plotly_chart(chart, width='stretch')
         else:
             st.info("Dados de sentimento não disponíveis")
     
     with col_right:
         st.markdown('<div class="section-header"><h3>☁️ Termos Mais Mencionados</h3></div>', unsafe_allow_html=True)
-        if 'full_text' in df_filtrado.columns and not df_filtrado.empty:
-            wordcloud = generate_wordcloud(df_filtrado['full_text'].tolist())
-            if wordcloud:
-                fig, ax = plt.subplots(figsize=(10, 5))
-                ax.imshow(wordcloud, interpolation='bilinear')
-                ax.axis('off')
-                st.pyplot(fig)
+        if total_filtrado:
+            frequencias = obter_frequencias_palavras(versao, filtros)
+            if frequencias:
+                # PNG em cache na hora; na falta, o desenho roda em segundo plano
+                try:
+                    imagem = obter_cache_nuvens().obter(frequencias)
+                except FalhaNuvem as erro:
+                    st.error(f"Não foi possível gerar a nuvem de palavras: {erro}")
+                else:
+                    if imagem is not None:
+                        st.image(imagem, width='stretch')
+                    else:
+                        aguardar_nuvem_palavras(frequencias)
             else:
                 st.info("Aguardando mais dados para gerar a nuvem de palavras")
         else:
             st.info("Dados de texto não disponíveis")
     
     # Novo gráfico - Distribuição por termo de busca
-    if 'search_term' in df_filtrado.columns and len(df_filtrado['search_term'].unique()) > 1:
+    termo_counts = somar_cubo(cubo, 'search_term')
+    if len(termo_counts) > 1:
         st.markdown('<div class="section-header"><h3>🔍 Distribuição por Termo de Busca</h3></div>', unsafe_allow_html=True)
         
         # Gráfico de barras por termo de busca
-        termo_counts = df_filtrado['search_term'].value_counts()
         fig_bar = px.bar(
             x=termo_counts.index,
             y=termo_counts.values,
@@ -415,20 +573,13 @@ def main():
         st.plotly_chart(fig_bar, width='stretch')
     
     # Novo gráfico - Timeline de notícias (se houver dados de data)
-    if ('published' in df_filtrado.columns or 'pub_date' in df_filtrado.columns) and not df_filtrado.empty:
+    if not cubo.empty:
         st.markdown('<div class="section-header"><h3>📅 Timeline de Notícias</h3></div>', unsafe_allow_html=True)
         
         try:
-            df_timeline = df_filtrado.copy()
-            date_col = 'published' if 'published' in df_filtrado.columns else 'pub_date'
-            df_timeline[date_col] = pd.to_datetime(df_timeline[date_col], errors='coerce')
-            df_timeline = df_timeline.dropna(subset=[date_col])
+            timeline_data = obter_dados_timeline(versao, filtros)
             
-            if not df_timeline.empty:
-                # Agrupa por data
-                timeline_data = df_timeline.groupby(df_timeline[date_col].dt.date).size().reset_index()
-                timeline_data.columns = ['data', 'quantidade']
-                
+            if not timeline_data.empty:
                 fig_timeline = px.line(
                     timeline_data,
                     x='data',
@@ -444,44 +595,50 @@ def main():
     # Tabela de notícias
     st.markdown('<div class="section-header"><h3>📰 Notícias</h3></div>', unsafe_allow_html=True)
     
-    # Mostrar tabela
-    if not df_filtrado.empty:
-        # Determinar quais colunas mostrar
-        colunas_disponiveis = df_filtrado.columns.tolist()
-        colunas_exibir = []
-        
-        if 'title' in colunas_disponiveis:
-            colunas_exibir.append('title')
-        if 'sentiment' in colunas_disponiveis:
-            colunas_exibir.append('sentiment')
-        if 'search_term' in colunas_disponiveis:
-            colunas_exibir.append('search_term')
-        if 'pub_date' in colunas_disponiveis:
-            colunas_exibir.append('pub_date')
-        elif 'published' in colunas_disponiveis:
-            colunas_exibir.append('published')
-        
-        # Se não temos as colunas padrão, mostra as primeiras disponíveis
-        if not colunas_exibir:
-            colunas_exibir = colunas_disponiveis[:4]
+    # Só a página visível sai do armazenamento e vai para o navegador
+    if total_filtrado:
+        paginas = -(-total_filtrado // TAMANHO_PAGINA)
+        pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, step=1)
+        st.caption(f"Página {pagina} de {paginas} · {TAMANHO_PAGINA} notícias por página")
         
         st.dataframe(
-            df_filtrado[colunas_exibir],
+            obter_pagina(versao, filtros, int(pagina)),
             width='stretch',
             height=400
         )
         
-        # Download
-        csv_data = df_filtrado.to_csv(index=False, encoding='utf-8-sig', sep=',', quotechar='"', quoting=1)
-        st.download_button(
+        # Download: o arquivo só é gerado quando o botão é clicado
+        momento = datetime.now().strftime('%Y%m%d_%H%M%S')
+        col_csv, col_parquet = st.columns(2)
+        col_csv.download_button(
             label="📥 Baixar dados (CSV)",
-            data=csv_data,
-            file_name=f"noticias_ia_piaui_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
+            data=functools.partial(exportar_noticias, filtros, 'csv'),
+            file_name=f"noticias_ia_piaui_{momento}.csv",
+            mime="text/csv",
+            on_click="ignore"
         )
+        # Parquet depende do pyarrow (opcional)
+        if ESQUEMA_SNAPSHOT is not None:
+            col_parquet.download_button(
+                label="📥 Baixar dados (Parquet)",
+                data=functools.partial(exportar_noticias, filtros, 'parquet'),
+                file_name=f"noticias_ia_piaui_{momento}.parquet",
+                mime="application/vnd.apache.parquet",
+                on_click="ignore"
+            )
     else:
         st.info("Nenhuma notícia corresponde aos filtros selecionados")
     
+    # Estatísticas do cache
+    estatisticas = _estatisticas_cache()
+    acertos = estatisticas['consultas'] - estatisticas['faltas']
+    st.sidebar.markdown("### 📦 Cache")
+    st.sidebar.caption(f"Acertos: {acertos} · Faltas: {estatisticas['faltas']}")
+    
+    # Painel de desempenho (só com as métricas ligadas: MONITOR_METRICAS=1)
+    if metricas.ativo:
+        mostrar_painel_desempenho()
+    
     # Rodapé informativo
     st.markdown("""
     <div class="footer">
@@ -501,4 +658,6 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with metricas.cronometrar('renderizacao_dashboard'):
+        main()
+    metricas.exportar()
\ No newline at end of file
@@ -0,0 +1,262 @@
+import hashlib
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from analise_sentimento import Tokenizador
+from armazenamento import chave_noticia
+
+# Primo de Mersenne usado nas permutações do MinHash
+PRIMO_MINHASH = (1 << 61) - 1
+
+
+class DetectorDuplicatas:
+    """Detecta notícias quase duplicadas (MinHash + LSH) contra todo o histórico
+
+    As assinaturas e as bandas do LSH ficam gravadas no banco das notícias,
+    então cada lote novo custa algumas consultas por notícia, sem comparar
+    pares com o histórico inteiro. Cópias de uma mesma matéria (títulos
+    levemente diferentes, sufixo do veículo) ficam agrupadas sob a chave da
+    primeira notícia vista, a canônica.
+    """
+
+    def __init__(self, store, num_permutacoes=64, bandas=16, limiar=0.5, semente=7):
+        if num_permutacoes % bandas:
+            raise ValueError("num_permutacoes deve ser múltiplo de bandas")
+
+        self.store = store
+        self.bandas = bandas
+        self.linhas_por_banda = num_permutacoes // bandas
+        # Similaridade de Jaccard estimada a partir da qual duas notícias são a mesma matéria
+        self.limiar = limiar
+        self.tokenizador = Tokenizador()
+
+        aleatorio = np.random.RandomState(semente)
+        self._a = aleatorio.randint(1, 1 << 32, size=num_permutacoes, dtype=np.uint64)
+        self._b = aleatorio.randint(0, 1 << 32, size=num_permutacoes, dtype=np.uint64)
+
+        with self.store.conectar() as conexao:
+            conexao.executescript('''
+                CREATE TABLE IF NOT EXISTS dedup_assinaturas (
+                    chave TEXT PRIMARY KEY,
+                    canonica TEXT NOT NULL,
+                    assinatura BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_dedup_canonica ON dedup_assinaturas(canonica);
+                CREATE TABLE IF NOT EXISTS dedup_bandas (
+                    banda INTEGER NOT NULL,
+                    valor INTEGER NOT NULL,
+                    chave TEXT NOT NULL,
+                    PRIMARY KEY (banda, valor, chave)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_dedup_bandas_chave ON dedup_bandas(chave);
+            ''')
+
+    def _shingles(self, titulo):
+        """Pares de palavras consecutivas do título, sem o sufixo " - Veículo" """
+        if not titulo or not isinstance(titulo, str):
+            return set()
+
+        partes = titulo.rsplit(' - ', 1)
+        if len(partes) == 2 and len(partes[1].split()) <= 5:
+            titulo = partes[0]
+
+        palavras = list(self.tokenizador.tokenize(titulo))
+        if len(palavras) < 2:
+            return set(palavras)
+        return {f"{anterior} {palavra}" for anterior, palavra in zip(palavras, palavras[1:])}
+
+    def assinatura(self, titulo):
+        """Assinatura MinHash do título (None quando não há palavras)"""
+        shingles = self._shingles(titulo)
+        if not shingles:
+            return None
+
+        valores = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in shingles], dtype=np.uint64)
+        # (a * x + b) mod p cabe em 64 bits porque a, b e x têm no máximo 32 bits
+        permutados = (np.outer(valores, self._a) + self._b) % np.uint64(PRIMO_MINHASH)
+        return permutados.min(axis=0)
+
+    def _valores_bandas(self, assinatura):
+        """Hash de cada banda da assinatura, usado como chave do LSH"""
+        valores = []
+        for banda in range(self.bandas):
+            trecho = assinatura[banda * self.linhas_por_banda:(banda + 1) * self.linhas_por_banda]
+            resumo = hashlib.blake2b(trecho.tobytes(), digest_size=8).digest()
+            valores.append(int.from_bytes(resumo, 'big', signed=True))
+        return valores
+
+    def agrupar(self, noticias, gravar=True):
+        """Associa cada notícia do lote à chave canônica da sua matéria
+
+        Retorna um dicionário chave -> chave canônica. Notícias já vistas
+        mantêm o grupo gravado; com gravar as novas entram no índice (só
+        notícias que existem no banco devem ser gravadas).
+        """
+        canonicas = {}
+        # Notícias novas do próprio lote, ainda não gravadas
+        assinaturas_lote = {}
+        bandas_lote = {}
+        novas_assinaturas = []
+        novas_bandas = []
+
+        with self.store.conectar() as conexao:
+            for noticia in noticias:
+                chave = chave_noticia(noticia)
+                if not chave or chave in canonicas:
+                    continue
+
+                gravada = conexao.execute(
+                    'SELECT canonica FROM dedup_assinaturas WHERE chave = ?', (chave,)
+                ).fetchone()
+                if gravada:
+                    canonicas[chave] = gravada[0]
+                    continue
+
+                assinatura = self.assinatura(noticia.get('title'))
+                if assinatura is None:
+                    canonicas[chave] = chave
+                    continue
+                valores = self._valores_bandas(assinatura)
+
+                # Candidatas: notícias que coincidem em pelo menos uma banda
+                candidatas = set()
+                for banda, valor in enumerate(valores):
+                    candidatas.update(bandas_lote.get((banda, valor), ()))
+                    candidatas.update(linha[0] for linha in conexao.execute(
+                        'SELECT chave FROM dedup_bandas WHERE banda = ? AND valor = ?', (banda, valor)
+                    ))
+
+                melhor, melhor_similaridade = None, self.limiar
+                for candidata in candidatas:
+                    if candidata in assinaturas_lote:
+                        assinatura_candidata, canonica_candidata = assinaturas_lote[candidata]
+                    else:
+                        linha = conexao.execute(
+                            'SELECT assinatura, canonica FROM dedup_assinaturas WHERE chave = ?', (candidata,)
+                        ).fetchone()
+                        assinatura_candidata = np.frombuffer(linha[0], dtype=np.uint64)
+                        canonica_candidata = linha[1]
+
+                    similaridade = float(np.mean(assinatura == assinatura_candidata))
+                    if similaridade >= melhor_similaridade:
+                        melhor, melhor_similaridade = canonica_candidata, similaridade
+
+                canonica = melhor or chave
+                canonicas[chave] = canonica
+                assinaturas_lote[chave] = (assinatura, canonica)
+                novas_assinaturas.append((chave, canonica, assinatura.tobytes()))
+                for banda, valor in enumerate(valores):
+                    bandas_lote.setdefault((banda, valor), []).append(chave)
+                    novas_bandas.append((banda, valor, chave))
+
+            if gravar:
+                conexao.executemany('INSERT OR IGNORE INTO dedup_assinaturas VALUES (?, ?, ?)', novas_assinaturas)
+                conexao.executemany('INSERT OR IGNORE INTO dedup_bandas VALUES (?, ?, ?)', novas_bandas)
+
+        return canonicas
+
+    def registrar(self, noticias):
+        """Grava assinatura e bandas das notícias gravadas que ainda não estão no índice
+
+        Sem busca de candidatas: a notícia fica como canônica de si mesma.
+        As cópias de matérias já vistas são descartadas antes da gravação
+        (remover_quase_duplicatas), então o que chega aqui é canônico; as
+        cópias seguintes a encontram pelas bandas. Retorna quantas entraram.
+        """
+        novas_assinaturas = []
+        novas_bandas = []
+        with self.store.conectar() as conexao:
+            for noticia in noticias:
+                chave = chave_noticia(noticia)
+                if not chave or conexao.execute(
+                    'SELECT 1 FROM dedup_assinaturas WHERE chave = ?', (chave,)
+                ).fetchone():
+                    continue
+                assinatura = self.assinatura(noticia.get('title'))
+                if assinatura is None:
+                    continue
+                novas_assinaturas.append((chave, chave, assinatura.tobytes()))
+                novas_bandas.extend(
+                    (banda, valor, chave) for banda, valor in enumerate(self._valores_bandas(assinatura))
+                )
+
+            conexao.executemany('INSERT OR IGNORE INTO dedup_assinaturas VALUES (?, ?, ?)', novas_assinaturas)
+            conexao.executemany('INSERT OR IGNORE INTO dedup_bandas VALUES (?, ?, ?)', novas_bandas)
+        return len(novas_assinaturas)
+
+    def remover_quase_duplicatas(self, noticias):
+        """Mantém só as notícias canônicas, descartando cópias de matérias já vistas
+
+        Nada é gravado aqui: as assinaturas entram no índice quando as
+        notícias mantidas são gravadas pelo NewsStore, e as cópias
+        descartadas não deixam rastro no banco.
+        """
+        canonicas = self.agrupar(noticias, gravar=False)
+        unicas = []
+        for noticia in noticias:
+            chave = chave_noticia(noticia)
+            if canonicas.get(chave, chave) == chave:
+                unicas.append(noticia)
+        return unicas
+
+    def sincronizar(self, tamanho_lote=5000):
+        """Indexa as notícias do histórico que ainda não têm assinatura (carga inicial)"""
+        sql = '''
+            SELECT n.title, n.link FROM noticias n
+            LEFT JOIN dedup_assinaturas d ON d.chave = n.chave
+            WHERE d.chave IS NULL
+            ORDER BY n.id
+        '''
+        total = 0
+        with self.store.conectar() as conexao:
+            for lote in pd.read_sql_query(sql, conexao, chunksize=tamanho_lote):
+                total += len(self.agrupar(lote.to_dict('records')))
+        return total
+
+    def podar(self, tamanho_lote=5000):
+        """Remove assinaturas e bandas de notícias que não estão mais no banco
+
+        Notícias canônicas removidas deixam as cópias restantes como canônicas
+        de si mesmas. Retorna quantas assinaturas foram removidas.
+        """
+        removidas = 0
+        with self.store.conectar() as conexao:
+            while True:
+                cursor = conexao.execute('''
+                    DELETE FROM dedup_assinaturas WHERE chave IN (
+                        SELECT d.chave FROM dedup_assinaturas d
+                        WHERE NOT EXISTS (SELECT 1 FROM noticias n WHERE n.chave = d.chave)
+                        LIMIT ?
+                    )
+                ''', (tamanho_lote,))
+                conexao.commit()
+                removidas += cursor.rowcount
+                if cursor.rowcount < tamanho_lote:
+                    break
+
+            while True:
+                cursor = conexao.execute('''
+                    DELETE FROM dedup_bandas WHERE chave IN (
+                        SELECT b.chave FROM dedup_bandas b
+                        WHERE NOT EXISTS (SELECT 1 FROM noticias n WHERE n.chave = b.chave)
+                        LIMIT ?
+                    )
+                ''', (tamanho_lote,))
+                conexao.commit()
+                if cursor.rowcount == 0:
+                    break
+
+            conexao.execute('''
+                UPDATE dedup_assinaturas SET canonica = chave
+                WHERE canonica != chave AND canonica NOT IN (SELECT chave FROM dedup_assinaturas)
+            ''')
+        return removidas
+
+    def copias(self, canonica):
+        """Chaves de todas as notícias agrupadas sob a chave canônica"""
+        with self.store.conectar() as conexao:
+            return [linha[0] for linha in conexao.execute(
+                'SELECT chave FROM dedup_assinaturas WHERE canonica = ? ORDER BY chave', (canonica,)
+            )]
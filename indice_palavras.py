@@ -0,0 +1,169 @@
+from collections import Counter
+
+import pandas as pd
+
+from analise_sentimento import Tokenizador
+from armazenamento import COLUNAS_NOTICIA, chave_noticia, converter_data_publicacao
+
+
+class IndiceFrequencias:
+    """Índice incremental de frequência de palavras, gravado no mesmo banco das notícias
+
+    Guarda a contagem de palavras de cada notícia e os agregados por
+    (dia, termo, sentimento), de modo que o topo das palavras de qualquer
+    combinação de filtros sai da soma de contadores já calculados.
+    """
+
+    def __init__(self, store, tamanho_min=3, tokenizador=None):
+        self.store = store
+        self.tamanho_min = tamanho_min
+        self.tokenizador = tokenizador or Tokenizador()
+        if self.store.somente_leitura:
+            return
+        with self.store.conectar() as conexao:
+            conexao.executescript('''
+                CREATE TABLE IF NOT EXISTS indice_documentos (
+                    chave TEXT PRIMARY KEY,
+                    dia TEXT NOT NULL,
+                    search_term TEXT NOT NULL,
+                    sentiment TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS indice_tokens_documento (
+                    chave TEXT NOT NULL,
+                    token TEXT NOT NULL,
+                    quantidade INTEGER NOT NULL,
+                    PRIMARY KEY (chave, token)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS indice_agregados (
+                    dia TEXT NOT NULL,
+                    search_term TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    token TEXT NOT NULL,
+                    quantidade INTEGER NOT NULL,
+                    PRIMARY KEY (dia, search_term, sentiment, token)
+                ) WITHOUT ROWID;
+            ''')
+
+    def _metadados(self, noticia):
+        """Retorna (dia, termo, sentimento) usados como chave dos agregados"""
+        def texto(coluna):
+            valor = noticia.get(coluna)
+            return "" if valor is None or pd.isna(valor) else str(valor)
+
+        data = texto('published') or converter_data_publicacao(texto('pub_date')) or texto('collected_at')
+        return data[:10], texto('search_term'), texto('sentiment')
+
+    def _texto(self, noticia):
+        """Texto indexado: full_text ou, na falta dele, título e descrição"""
+        for valor in (noticia.get('full_text'), f"{noticia.get('title') or ''} {noticia.get('description') or ''}"):
+            if isinstance(valor, str) and valor.strip():
+                return valor
+        return ""
+
+    def atualizar(self, noticias, tamanho_lote=500):
+        """Indexa apenas as notícias novas (ou cujo termo/sentimento/dia mudou)
+
+        Retorna a quantidade de notícias indexadas ou movidas.
+        """
+        documentos = {}
+        for noticia in noticias:
+            chave = chave_noticia(noticia)
+            if chave:
+                documentos[chave] = noticia
+
+        if not documentos:
+            return 0
+
+        # Leitura do que já está indexado e gravação dos deltas sob a mesma trava de
+        # escrita: dois escritores não contam a mesma notícia duas vezes
+        with self.store.conectar(escrita=True) as conexao:
+            chaves = list(documentos)
+            existentes = {}
+            for inicio in range(0, len(chaves), tamanho_lote):
+                lote = chaves[inicio:inicio + tamanho_lote]
+                marcadores = ', '.join('?' * len(lote))
+                cursor = conexao.execute(
+                    f'SELECT chave, dia, search_term, sentiment FROM indice_documentos WHERE chave IN ({marcadores})',
+                    lote
+                )
+                existentes.update((linha[0], tuple(linha[1:])) for linha in cursor)
+
+            deltas = Counter()
+            tokens_novos = []
+            documentos_alterados = []
+            for chave, noticia in documentos.items():
+                metadados = self._metadados(noticia)
+                anteriores = existentes.get(chave)
+                if anteriores == metadados:
+                    continue
+
+                if anteriores is None:
+                    # Só as notícias nunca vistas são tokenizadas
+                    contagem = Counter(self.tokenizador.tokenize(
+                        self._texto(noticia), self.tamanho_min, remover_stop_words=True
+                    ))
+                    tokens_novos.extend((chave, token, quantidade) for token, quantidade in contagem.items())
+                else:
+                    # Mudou o agrupamento: move as contagens já gravadas
+                    contagem = dict(conexao.execute(
+                        'SELECT token, quantidade FROM indice_tokens_documento WHERE chave = ?', (chave,)
+                    ).fetchall())
+                    for token, quantidade in contagem.items():
+                        deltas[anteriores + (token,)] -= quantidade
+
+                for token, quantidade in contagem.items():
+                    deltas[metadados + (token,)] += quantidade
+                documentos_alterados.append((chave,) + metadados)
+
+            conexao.executemany('INSERT OR REPLACE INTO indice_tokens_documento VALUES (?, ?, ?)', tokens_novos)
+            conexao.executemany('INSERT OR REPLACE INTO indice_documentos VALUES (?, ?, ?, ?)', documentos_alterados)
+            conexao.executemany('''
+                INSERT INTO indice_agregados VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(dia, search_term, sentiment, token) DO UPDATE SET
+                    quantidade = quantidade + excluded.quantidade
+            ''', [chave + (quantidade,) for chave, quantidade in deltas.items() if quantidade])
+            conexao.executemany(
+                'DELETE FROM indice_agregados WHERE dia = ? AND search_term = ? AND sentiment = ? AND token = ? AND quantidade <= 0',
+                [chave for chave, quantidade in deltas.items() if quantidade < 0]
+            )
+
+        return len(documentos_alterados)
+
+    def sincronizar(self, tamanho_lote=5000):
+        """Indexa as notícias do armazenamento que ainda não estão no índice"""
+        colunas = ', '.join(f'n.{coluna}' for coluna in COLUNAS_NOTICIA)
+        sql = f'''
+            SELECT {colunas} FROM noticias n
+            LEFT JOIN indice_documentos d ON d.chave = n.chave
+            WHERE d.chave IS NULL OR d.sentiment != COALESCE(n.sentiment, '')
+        '''
+        # Em modo WAL a leitura não bloqueia as gravações feitas por atualizar()
+        with self.store.conectar() as conexao:
+            return sum(
+                self.atualizar(lote.to_dict('records'))
+                for lote in pd.read_sql_query(sql, conexao, chunksize=tamanho_lote)
+            )
+
+    def top_n(self, n=50, inicio=None, fim=None, termo=None, sentimento=None):
+        """Palavras mais frequentes para a combinação de filtros, somando os agregados"""
+        condicoes = []
+        parametros = []
+        if inicio is not None:
+            condicoes.append('dia >= ?')
+            parametros.append(pd.Timestamp(inicio).strftime('%Y-%m-%d'))
+        if fim is not None:
+            condicoes.append('dia < ?')
+            parametros.append(pd.Timestamp(fim).strftime('%Y-%m-%d'))
+        if termo is not None:
+            condicoes.append('search_term = ?')
+            parametros.append(termo)
+        if sentimento is not None:
+            condicoes.append('sentiment = ?')
+            parametros.append(sentimento)
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self.store.conectar() as conexao:
+            return conexao.execute(f'''
+                SELECT token, SUM(quantidade) AS total FROM indice_agregados {where}
+                GROUP BY token ORDER BY total DESC, token LIMIT ?
+            ''', parametros + [n]).fetchall()
@@ -0,0 +1,190 @@
+import hashlib
+from collections import deque
+
+import numpy as np
+
+# Palavras que invertem a polaridade das expressões logo depois delas
+NEGADORES = frozenset({'não', 'nem', 'nunca', 'jamais', 'sem'})
+
+# Incrementar quando as regras de pontuação mudarem (entra na versão do léxico)
+VERSAO_REGRAS = 1
+
+
+class AutomatoLexico:
+    """Léxico de expressões de uma ou mais palavras compilado em um autômato Aho-Corasick sobre tokens
+
+    O alfabeto do autômato são os códigos das palavras que aparecem em alguma
+    expressão (ou são negadores); qualquer outra palavra só interrompe a
+    sequência. Por isso a varredura percorre apenas os tokens conhecidos, uma
+    única vez, e o custo por documento não cresce com o número de expressões.
+
+    Uma expressão contida em outra casada no mesmo trecho é descartada
+    ("corte de empregos" não conta também "corte"), e a polaridade é invertida
+    quando há um negador até janela_negacao tokens antes do seu início
+    ("não é bom"). Cada negador vale só para a primeira expressão seguinte.
+    """
+
+    def __init__(self, expressoes, negadores=NEGADORES, janela_negacao=3):
+        """expressoes: {tupla de tokens: polaridade (1 positiva, -1 negativa)}"""
+        self.expressoes = [tuple(tokens) for tokens in expressoes if tokens]
+        self.polaridades = np.array([expressoes[tokens] for tokens in self.expressoes], dtype=np.int8)
+        self.tamanhos = np.array([len(tokens) for tokens in self.expressoes], dtype=np.int64)
+        self.janela_negacao = janela_negacao
+        # Identifica o léxico compilado: muda com qualquer expressão, negador ou regra
+        conteudo = repr((VERSAO_REGRAS, sorted(expressoes.items()), sorted(negadores), janela_negacao))
+        self.versao = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+        # Vocabulário ordenado: o código de cada palavra é a sua posição
+        self.vocabulario = sorted({token for tokens in self.expressoes for token in tokens} | set(negadores))
+        self.codigos = {token: codigo for codigo, token in enumerate(self.vocabulario)}
+        self.eh_negador = np.array([token in negadores for token in self.vocabulario], dtype=bool)
+        # Expressão de uma palavra só de cada código (-1 se não houver)
+        self._padrao_unitario = np.full(len(self.vocabulario), -1, dtype=np.int64)
+        for padrao, tokens in enumerate(self.expressoes):
+            if len(tokens) == 1:
+                self._padrao_unitario[self.codigos[tokens[0]]] = padrao
+
+        # Cópias em listas para a varredura de um documento só
+        self._lista_tamanhos = self.tamanhos.tolist()
+        self._lista_polaridades = self.polaridades.tolist()
+        self._codigos_negadores = frozenset(np.flatnonzero(self.eh_negador).tolist())
+
+        self._compilar()
+
+    def _compilar(self):
+        """Monta a trie das expressões e os links de falha (busca em largura)"""
+        # Por estado: transições (código -> estado) e expressões que terminam nele
+        self._transicoes = [{}]
+        self._saidas = [[]]
+        for padrao, tokens in enumerate(self.expressoes):
+            estado = 0
+            for token in tokens:
+                codigo = self.codigos[token]
+                proximo = self._transicoes[estado].get(codigo)
+                if proximo is None:
+                    proximo = self._transicoes[estado][codigo] = len(self._transicoes)
+                    self._transicoes.append({})
+                    self._saidas.append([])
+                estado = proximo
+            self._saidas[estado].append(padrao)
+
+        # Os filhos da raiz falham para a raiz; os demais, para o maior sufixo presente na trie
+        self._falhas = [0] * len(self._transicoes)
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for codigo, proximo in self._transicoes[estado].items():
+                falha = self._falhas[estado]
+                while falha and codigo not in self._transicoes[falha]:
+                    falha = self._falhas[falha]
+                self._falhas[proximo] = self._transicoes[falha].get(codigo, 0)
+                # Herda as expressões que terminam no estado de falha (sufixos)
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falhas[proximo]]
+                fila.append(proximo)
+
+    def casamentos(self, posicoes, codigos):
+        """Expressões casadas em uma única varredura dos tokens conhecidos
+
+        posicoes deve ser crescente; posições não consecutivas interrompem as
+        expressões em andamento (vários documentos podem ser varridos juntos
+        separando-os por um intervalo de posições). Retorna, para cada
+        casamento não contido em outro, o índice do seu primeiro token em
+        posicoes e o número da expressão.
+        """
+        # Sequências de tokens conhecidos consecutivos: as de um token só (a
+        # maioria no texto corrido) casam no máximo uma expressão de uma palavra,
+        # resolvida sem percorrer o autômato
+        inicio_sequencia = np.concatenate(([True], np.diff(posicoes) != 1)) if len(posicoes) else np.array([], dtype=bool)
+        sequencias = np.cumsum(inicio_sequencia) - 1
+        isolados = np.bincount(sequencias)[sequencias] == 1 if len(posicoes) else inicio_sequencia
+
+        indices_isolados = np.flatnonzero(isolados)
+        padroes_isolados = self._padrao_unitario[codigos[indices_isolados]]
+        casados = padroes_isolados >= 0
+
+        transicoes, falhas, saidas = self._transicoes, self._falhas, self._saidas
+        indices_fim, padroes = [], []
+        estado = 0
+        indices_sequencias = np.flatnonzero(~isolados)
+        for indice, codigo, reiniciar in zip(indices_sequencias.tolist(), codigos[indices_sequencias].tolist(),
+                                             inicio_sequencia[indices_sequencias].tolist()):
+            if reiniciar:
+                estado = 0
+            while estado and codigo not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(codigo, 0)
+            for padrao in saidas[estado]:
+                indices_fim.append(indice)
+                padroes.append(padrao)
+
+        fins = np.concatenate((indices_isolados[casados], np.array(indices_fim, dtype=np.int64)))
+        padroes = np.concatenate((padroes_isolados[casados], np.array(padroes, dtype=np.int64)))
+        inicios = fins - self.tamanhos[padroes] + 1
+
+        # Descarta casamentos contidos em outro: ordenados por início e, no
+        # mesmo início, do mais longo ao mais curto, um casamento está contido
+        # se algum anterior termina nele ou depois
+        ordem = np.lexsort((-fins, inicios))
+        inicios, fins, padroes = inicios[ordem], fins[ordem], padroes[ordem]
+        maior_fim_anterior = np.concatenate(([-1], np.maximum.accumulate(fins)[:-1]))
+        mantidos = fins > maior_fim_anterior
+        return inicios[mantidos], padroes[mantidos]
+
+    def pontuar(self, posicoes, codigos):
+        """Casamentos com a polaridade final: (índice do início, expressão, polaridade)"""
+        inicios, padroes = self.casamentos(posicoes, codigos)
+        polaridades = self.polaridades[padroes]
+
+        negadores = posicoes[self.eh_negador[codigos]]
+        if len(negadores) and len(inicios):
+            # Último negador antes do início de cada casamento (em ordem de início),
+            # desde que dentro da janela e depois do início do casamento anterior
+            posicoes_inicio = posicoes[inicios]
+            anterior = np.searchsorted(negadores, posicoes_inicio, side='left') - 1
+            negador = negadores[np.maximum(anterior, 0)]
+            inicio_anterior = np.concatenate(([-1], posicoes_inicio[:-1]))
+            negado = (anterior >= 0) & (negador >= posicoes_inicio - self.janela_negacao) & (negador > inicio_anterior)
+            polaridades = np.where(negado, -polaridades, polaridades)
+        return inicios, padroes, polaridades
+
+    def pontuar_documento(self, tokens):
+        """Mesmo resultado de pontuar() para os tokens de um único documento: [(expressão, polaridade)]
+
+        Versão em Python puro, sem o custo fixo das operações do numpy em
+        listas curtas.
+        """
+        transicoes, falhas, saidas = self._transicoes, self._falhas, self._saidas
+        tamanhos = self._lista_tamanhos
+        casamentos = []
+        negadores = []
+        estado = 0
+        for posicao, token in enumerate(tokens):
+            codigo = self.codigos.get(token)
+            if codigo is None:
+                estado = 0
+                continue
+            if codigo in self._codigos_negadores:
+                negadores.append(posicao)
+            while estado and codigo not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(codigo, 0)
+            for padrao in saidas[estado]:
+                casamentos.append((posicao - tamanhos[padrao] + 1, -posicao, padrao))
+
+        # Mesmas regras de pontuar(): contidos descartados e negador consumido pela primeira expressão
+        casamentos.sort()
+        resultado = []
+        maior_fim, inicio_anterior, negador, proximo_negador = -1, -1, None, 0
+        for inicio, fim_negativo, padrao in casamentos:
+            if -fim_negativo <= maior_fim:
+                continue
+            maior_fim = -fim_negativo
+            while proximo_negador < len(negadores) and negadores[proximo_negador] < inicio:
+                negador = negadores[proximo_negador]
+                proximo_negador += 1
+            polaridade = self._lista_polaridades[padrao]
+            if negador is not None and negador >= inicio - self.janela_negacao and negador > inicio_anterior:
+                polaridade = -polaridade
+            inicio_anterior = inicio
+            resultado.append((padrao, polaridade))
+        return resultado
@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from armazenamento import TIPO_SENTIMENTO
+from metricas import metricas
+
+
+class MemoSentimentos:
+    """Sentimentos já calculados, gravados no banco pelo hash do texto e pela versão do léxico
+
+    Textos já vistos com o mesmo léxico não são reanalisados; só os novos
+    passam pelo SentimentAnalyzer. Quando as listas de palavras mudam, a
+    versão do léxico muda junto e as entradas antigas são descartadas.
+    """
+
+    def __init__(self, store, analisador, tamanho_lote=500):
+        self.store = store
+        self.analisador = analisador
+        self.versao = analisador.versao_lexico
+        # Hashes por consulta IN, abaixo do limite de parâmetros do SQLite
+        self.tamanho_lote = tamanho_lote
+        with self.store.conectar() as conexao:
+            conexao.execute('''
+                CREATE TABLE IF NOT EXISTS memo_sentimentos (
+                    versao TEXT NOT NULL,
+                    hash BLOB NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    criado_em TEXT NOT NULL,
+                    PRIMARY KEY (versao, hash)
+                ) WITHOUT ROWID
+            ''')
+            conexao.execute('DELETE FROM memo_sentimentos WHERE versao != ?', (self.versao,))
+
+    @staticmethod
+    def hash_texto(texto):
+        return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+    def _consultar(self, conexao, hashes):
+        """Sentimentos gravados para os hashes informados"""
+        conhecidos = {}
+        for inicio in range(0, len(hashes), self.tamanho_lote):
+            lote = hashes[inicio:inicio + self.tamanho_lote]
+            marcadores = ', '.join('?' * len(lote))
+            conhecidos.update(conexao.execute(
+                f'SELECT hash, sentiment FROM memo_sentimentos WHERE versao = ? AND hash IN ({marcadores})',
+                [self.versao] + lote
+            ))
+        return conhecidos
+
+    def classificar(self, textos):
+        """Mesmo resultado de SentimentAnalyzer.classificar_textos, analisando só os textos inéditos"""
+        textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+        hashes = [self.hash_texto(texto) for texto in textos]
+
+        with self.store.conectar() as conexao:
+            conhecidos = self._consultar(conexao, list(set(hashes)))
+            faltantes = {}
+            for hash_, texto in zip(hashes, textos):
+                if hash_ not in conhecidos:
+                    faltantes.setdefault(hash_, texto)
+
+            if faltantes:
+                sentimentos = self.analisador.classificar_textos(list(faltantes.values())).tolist()
+                novos = dict(zip(faltantes, sentimentos))
+                criado_em = datetime.now(timezone.utc).isoformat()
+                conexao.executemany(
+                    'INSERT OR IGNORE INTO memo_sentimentos VALUES (?, ?, ?, ?)',
+                    [(self.versao, hash_, sentimento, criado_em) for hash_, sentimento in novos.items()]
+                )
+                conhecidos.update(novos)
+
+        metricas.incrementar('memo_sentimentos_acertos', len(hashes) - len(faltantes))
+        metricas.incrementar('memo_sentimentos_faltas', len(faltantes))
+        return pd.Series([conhecidos[hash_] for hash_ in hashes], index=textos.index, dtype=TIPO_SENTIMENTO)
+
@@ -0,0 +1,144 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Limites (em segundos) dos baldes dos histogramas de duração
+BALDES_DURACAO = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Contexto vazio compartilhado: com as métricas desligadas cronometrar() não aloca nada
+_SEM_MEDICAO = nullcontext()
+
+
+class _Cronometro:
+    __slots__ = ('metricas', 'nome', 'inicio')
+
+    def __init__(self, metricas, nome):
+        self.metricas = metricas
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.metricas.observar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+class Metricas:
+    """Cronômetros, contadores e histogramas das etapas do pipeline
+
+    Desligadas, cronometrar() devolve um contexto vazio e incrementar()
+    retorna na primeira linha, então a instrumentação pode ficar nos
+    trechos quentes. Os valores são exportados no formato texto do
+    Prometheus (para o textfile collector do node_exporter) e/ou como uma
+    linha JSON por exportação.
+    """
+
+    def __init__(self, ativo=False, arquivo_prometheus='metricas.prom', arquivo_json=None, prefixo='monitor_ia'):
+        self.ativo = ativo
+        self.arquivo_prometheus = arquivo_prometheus
+        self.arquivo_json = arquivo_json
+        self.prefixo = prefixo
+        self._contadores = {}
+        # nome -> [contagens por balde (+ o balde infinito), soma, quantidade]
+        self._histogramas = {}
+        self._trava = threading.Lock()
+
+    def cronometrar(self, etapa):
+        """Mede a duração do bloco no histograma '<etapa>_segundos'"""
+        if not self.ativo:
+            return _SEM_MEDICAO
+        return _Cronometro(self, f"{etapa}_segundos")
+
+    def incrementar(self, nome, valor=1):
+        """Soma valor ao contador '<nome>_total'"""
+        if not self.ativo:
+            return
+        nome = f"{nome}_total"
+        with self._trava:
+            self._contadores[nome] = self._contadores.get(nome, 0) + valor
+
+    def observar(self, nome, valor):
+        """Registra uma observação no histograma"""
+        if not self.ativo:
+            return
+        with self._trava:
+            histograma = self._histogramas.get(nome)
+            if histograma is None:
+                histograma = self._histogramas[nome] = [[0] * (len(BALDES_DURACAO) + 1), 0.0, 0]
+            histograma[0][bisect.bisect_left(BALDES_DURACAO, valor)] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+
+    def limpar(self):
+        """Zera todos os valores registrados"""
+        with self._trava:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def resumo(self):
+        """Valores atuais: contadores e, por histograma, quantidade, soma, média e p95 aproximado"""
+        with self._trava:
+            contadores = dict(self._contadores)
+            histogramas = {nome: (list(baldes), soma, quantidade)
+                           for nome, (baldes, soma, quantidade) in self._histogramas.items()}
+
+        etapas = {}
+        for nome, (baldes, soma, quantidade) in sorted(histogramas.items()):
+            # p95 pelo limite superior do balde em que cai a 95ª percentil
+            # (None quando cai no balde infinito)
+            alvo, acumulado, p95 = 0.95 * quantidade, 0, None
+            for limite, contagem in zip(BALDES_DURACAO + (None,), baldes):
+                acumulado += contagem
+                if acumulado >= alvo:
+                    p95 = limite
+                    break
+            etapas[nome] = {'quantidade': quantidade, 'soma': soma,
+                            'media': soma / quantidade if quantidade else 0.0, 'p95': p95}
+        return {'contadores': dict(sorted(contadores.items())), 'histogramas': etapas}
+
+    def formato_prometheus(self):
+        """Texto no formato de exposição do Prometheus"""
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted((nome, list(baldes), soma, quantidade)
+                                 for nome, (baldes, soma, quantidade) in self._histogramas.items())
+
+        linhas = []
+        for nome, valor in contadores:
+            nome = f"{self.prefixo}_{nome}"
+            linhas += [f"# TYPE {nome} counter", f"{nome} {valor}"]
+        for nome, baldes, soma, quantidade in histogramas:
+            nome = f"{self.prefixo}_{nome}"
+            linhas.append(f"# TYPE {nome} histogram")
+            acumulado = 0
+            for limite, contagem in zip(BALDES_DURACAO, baldes):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{{le="{limite}"}} {acumulado}')
+            linhas += [f'{nome}_bucket{{le="+Inf"}} {quantidade}', f"{nome}_sum {soma}", f"{nome}_count {quantidade}"]
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self):
+        """Grava os arquivos configurados (nada acontece com as métricas desligadas)"""
+        if not self.ativo:
+            return
+        if self.arquivo_prometheus:
+            # Substituição atômica: o coletor do Prometheus nunca lê um arquivo pela metade
+            temporario = f"{self.arquivo_prometheus}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(self.formato_prometheus())
+            os.replace(temporario, self.arquivo_prometheus)
+        if self.arquivo_json:
+            with open(self.arquivo_json, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'momento': time.time(), **self.resumo()}, ensure_ascii=False) + "\n")
+
+
+# Instância usada pelos módulos do pipeline; ligada com MONITOR_METRICAS=1
+metricas = Metricas(
+    ativo=os.environ.get('MONITOR_METRICAS') == '1',
+    arquivo_json=os.environ.get('MONITOR_METRICAS_JSON')
+)
@@ -0,0 +1,119 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from wordcloud import WordCloud
+
+from metricas import metricas
+
+# Parâmetros de desenho da nuvem de palavras (fazem parte da chave do cache)
+PARAMETROS_NUVEM = {
+    'width': 800,
+    'height': 400,
+    'background_color': 'white',
+    'max_words': 50,
+    'colormap': 'plasma',
+    'relative_scaling': 0.6,
+    'min_font_size': 10
+}
+
+
+def chave_nuvem(frequencias, parametros=PARAMETROS_NUVEM):
+    """Hash da tabela de frequências junto com os parâmetros de desenho"""
+    conteudo = json.dumps([sorted(frequencias.items()), sorted(parametros.items())], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def renderizar_nuvem(frequencias, parametros=PARAMETROS_NUVEM):
+    """PNG da nuvem de palavras, desenhado pelo próprio WordCloud (sem figura do matplotlib)"""
+    with metricas.cronometrar('nuvem_palavras'):
+        imagem = WordCloud(**parametros).generate_from_frequencies(frequencias).to_image()
+        saida = io.BytesIO()
+        imagem.save(saida, format='PNG', optimize=True)
+    return saida.getvalue()
+
+
+class FalhaNuvem(Exception):
+    """A renderização da nuvem falhou recentemente (não é tentada de novo até expirar)"""
+
+
+class CacheNuvens:
+    """Imagens PNG de nuvens de palavras já desenhadas, com descarte LRU
+
+    A busca do layout é cara, então a renderização de uma nuvem ausente roda
+    numa thread de trabalho: obter() retorna na hora com a imagem em cache ou
+    None, e a mesma nuvem nunca é desenhada duas vezes ao mesmo tempo. Uma
+    renderização que falha fica registrada por tempo_falha segundos, durante
+    os quais obter() levanta FalhaNuvem em vez de agendá-la de novo.
+    """
+
+    def __init__(self, capacidade=32, parametros=None, max_workers=1, tempo_falha=300):
+        self.capacidade = capacidade
+        self.parametros = dict(parametros or PARAMETROS_NUVEM)
+        # chave -> bytes PNG, do menos para o mais recentemente usado
+        self._imagens = OrderedDict()
+        # chave -> Future das renderizações em andamento
+        self._pendentes = {}
+        # chave -> (momento da falha, mensagem) das renderizações que falharam
+        self._falhas = {}
+        self.tempo_falha = tempo_falha
+        self._trava = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='nuvem_palavras')
+
+    def obter(self, frequencias, espera=0):
+        """PNG das frequências; na falta, agenda a renderização e aguarda até espera segundos
+
+        Retorna None se a imagem ainda não estiver pronta e levanta FalhaNuvem
+        se a renderização falhou há menos de tempo_falha segundos.
+        """
+        chave = chave_nuvem(frequencias, self.parametros)
+        with self._trava:
+            imagem = self._imagens.get(chave)
+            if imagem is not None:
+                self._imagens.move_to_end(chave)
+                metricas.incrementar('nuvem_cache_acertos')
+                return imagem
+            falha = self._falhas.get(chave)
+            if falha is not None:
+                if time.monotonic() - falha[0] < self.tempo_falha:
+                    raise FalhaNuvem(falha[1])
+                del self._falhas[chave]
+            pendente = self._pendentes.get(chave)
+            if pendente is None:
+                pendente = self._pendentes[chave] = self._executor.submit(self._renderizar, chave, dict(frequencias))
+        metricas.incrementar('nuvem_cache_faltas')
+
+        if espera:
+            try:
+                return pendente.result(timeout=espera)
+            except TimeoutError:
+                pass
+            except Exception as erro:
+                raise FalhaNuvem(str(erro)) from erro
+        return None
+
+    def _renderizar(self, chave, frequencias):
+        try:
+            imagem = renderizar_nuvem(frequencias, self.parametros)
+        except Exception as erro:
+            metricas.incrementar('nuvem_falhas')
+            with self._trava:
+                del self._pendentes[chave]
+                self._falhas[chave] = (time.monotonic(), f"{type(erro).__name__}: {erro}")
+            raise
+
+        # Imagem gravada e pendência removida juntas: ninguém agenda a mesma chave de novo
+        with self._trava:
+            self._imagens[chave] = imagem
+            del self._pendentes[chave]
+            while len(self._imagens) > self.capacidade:
+                self._imagens.popitem(last=False)
+        return imagem
+
+    def encerrar(self):
+        """Para a thread de trabalho depois das renderizações em andamento"""
+        self._executor.shutdown(wait=True)
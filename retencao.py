@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Tabelas derivadas com dados por notícia, removidos junto com a notícia
+TABELAS_POR_NOTICIA = ['indice_tokens_documento', 'indice_documentos']
+
+
+class RetencaoHistorico:
+    """Mantém as notícias de uma janela recente e compacta as antigas em agregados diários
+
+    As notícias publicadas antes da janela são removidas, junto com os seus
+    dados no índice de palavras. Elas continuam contadas no cubo (dia, termo,
+    sentimento) de agregados_diarios, mantido pelo NewsStore desde a
+    gravação, e nos agregados de palavras do índice. Em seguida o detector de
+    duplicatas perde as assinaturas de tudo o que não está mais no banco.
+    O limite compactado fica registrado no banco, e o NewsStore recusa as
+    notícias anteriores a ele que os feeds voltarem a entregar.
+    """
+
+    def __init__(self, store, janela_dias=180, intervalo=3600, tamanho_lote=5000):
+        self.store = store
+        self.janela_dias = janela_dias
+        # Intervalo (em segundos) entre as execuções em segundo plano
+        self.intervalo = intervalo
+        # Cada lote é uma transação curta, para não bloquear os leitores
+        self.tamanho_lote = tamanho_lote
+        self._parar = threading.Event()
+        self._thread = None
+
+    def limite(self):
+        """Data a partir da qual as notícias são mantidas integralmente"""
+        return (datetime.now(timezone.utc) - timedelta(days=self.janela_dias)).isoformat()
+
+    def compactar(self):
+        """Compacta e remove as notícias fora da janela; retorna quantas foram removidas"""
+        limite = self.limite()
+        removidas = 0
+
+        while not self._parar.is_set():
+            with self.store.conectar() as conexao:
+                tabelas_existentes = {
+                    linha[0] for linha in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                }
+                linhas = conexao.execute('''
+                    SELECT id, chave FROM noticias
+                    WHERE published < :limite OR (published IS NULL AND collected_at < :limite)
+                    LIMIT :tamanho
+                ''', {'limite': limite, 'tamanho': self.tamanho_lote}).fetchall()
+
+                if not linhas:
+                    break
+
+                # Na mesma transação da remoção: nenhuma gravação traz de volta o que foi compactado
+                self.store.registrar_compactacao(conexao, limite)
+                conexao.executemany('DELETE FROM noticias WHERE id = ?', [(linha[0],) for linha in linhas])
+                chaves = [(linha[1],) for linha in linhas]
+                for tabela in TABELAS_POR_NOTICIA:
+                    if tabela in tabelas_existentes:
+                        conexao.executemany(f'DELETE FROM {tabela} WHERE chave = ?', chaves)
+
+            removidas += len(linhas)
+
+        # Assinaturas de quase duplicatas sem notícia: as compactadas agora e as que ficaram para trás
+        if not self._parar.is_set():
+            self.store.deduplicador.podar(self.tamanho_lote)
+
+        # Sentimentos memorizados antes da janela (no pior caso o texto é reanalisado uma vez)
+        with self.store.conectar() as conexao:
+            if conexao.execute("SELECT 1 FROM sqlite_master WHERE name = 'memo_sentimentos'").fetchone():
+                conexao.execute('DELETE FROM memo_sentimentos WHERE criado_em < ?', (limite,))
+
+        if removidas:
+            # O snapshot do dashboard passa a refletir a janela atual
+            self.store.exportar_snapshot()
+            print(f"Retenção: {removidas} notícias anteriores a {limite[:10]} compactadas em agregados diários")
+        return removidas
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.compactar()
+            except Exception as e:
+                print(f"Erro ao aplicar a retenção do histórico: {e}")
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self):
+        """Executa a compactação periodicamente em uma thread de segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name='retencao-historico', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Interrompe a thread de segundo plano"""
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,219 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agendamento import AgendadorAdaptativo, OrcamentoRequisicoes
+from analise_sentimento import SentimentAnalyzer
+from armazenamento import NewsStore, versao_snapshot
+from cache_feeds import FeedCache
+from coletor_rss import RSSNewsCollector
+from memo_sentimentos import MemoSentimentos
+from metricas import metricas
+from retencao import RetencaoHistorico
+
+
+class ServicoColeta:
+    """Serviço de coleta contínua: cada termo é consultado periodicamente em um loop asyncio
+
+    O intervalo de cada termo vem do AgendadorAdaptativo (termos com mais
+    notícias novas são consultados com mais frequência) e toda consulta
+    passa pelo orçamento global de requisições por minuto. As requisições
+    (bloqueantes) rodam em um pool de threads do tamanho configurado no
+    coletor e todas as gravações passam por uma única thread, então o
+    armazenamento tem um só escritor. Cada lote de notícias entra no banco
+    em uma transação e o snapshot do dashboard é publicado como uma nova
+    versão imutável, com troca atômica do ponteiro para a versão atual.
+    """
+
+    def __init__(self, coletor=None, store=None, agendador=None, intervalos_termo=None, jitter=0.2,
+                 backoff_inicial=60, backoff_max=3600, intervalo_snapshot=30, max_resultados=None):
+        self.store = store or NewsStore()
+        # Sem TTL no cache: o agendamento decide quando consultar e o feed é sempre
+        # revalidado com requisição condicional (304 quando nada mudou)
+        self.coletor = coletor or RSSNewsCollector(
+            cache=FeedCache(ttl=0), deduplicador=self.store.deduplicador
+        )
+        self.agendador = agendador or AgendadorAdaptativo(self.store)
+        # Intervalos fixos (em segundos) para termos que não devem ser adaptados
+        self.intervalos_termo = dict(intervalos_termo or {})
+        # Fração de variação aleatória das esperas, para não sincronizar os termos
+        self.jitter = jitter
+        # Espera após falhas consecutivas: backoff_inicial, 2x, 4x... até backoff_max
+        self.backoff_inicial = backoff_inicial
+        self.backoff_max = backoff_max
+        # Intervalo mínimo entre regravações do snapshot
+        self.intervalo_snapshot = intervalo_snapshot
+        self.max_resultados = max_resultados
+
+        self.analisador = SentimentAnalyzer()
+        # O feed devolve as mesmas notícias a cada consulta: só as inéditas são analisadas
+        self.memo = MemoSentimentos(self.store, self.analisador)
+        self.estado = {}
+        self._snapshot_pendente = False
+        self._loop = None
+        self._parar = None
+        self._thread = None
+
+    def intervalo_termo(self, termo):
+        """Intervalo de consulta do termo: o fixo, se configurado, ou o adaptativo"""
+        if termo in self.intervalos_termo:
+            return self.intervalos_termo[termo]
+        return self.agendador.intervalo(termo)
+
+    def _com_jitter(self, espera):
+        return espera * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def proxima_espera(self, termo, falhas):
+        """Tempo até a próxima consulta do termo, com backoff exponencial após falhas"""
+        if falhas:
+            espera = min(self.backoff_inicial * 2 ** (falhas - 1), self.backoff_max)
+        else:
+            espera = self.intervalo_termo(termo)
+        return self._com_jitter(espera)
+
+    def gravar(self, noticias):
+        """Deduplica, classifica e grava um lote de notícias; retorna quantas são novas"""
+        noticias = self.coletor.remover_duplicatas(noticias)
+        if not noticias:
+            return 0
+
+        registros = self.analisador.analyze_dataframe(self.coletor.para_dataframe(noticias), memo=self.memo).to_dict('records')
+        with metricas.cronometrar('gravacao_armazenamento'):
+            novas = self.store.upsert_noticias(registros)
+        metricas.incrementar('noticias_novas', len(novas))
+        if novas:
+            self._snapshot_pendente = True
+        return len(novas)
+
+    def preparar_historico(self):
+        """Carga inicial do que foi gravado por outras ferramentas (CSVs importados, processar_sentimentos)
+
+        Notícias do histórico sem assinatura entram no índice de quase
+        duplicatas, para que as cópias coletadas depois sejam reconhecidas, e
+        as ainda não indexadas entram no índice de frequências lido pelo
+        dashboard. Depois disso o índice de frequências é mantido pelo próprio
+        NewsStore a cada gravação; aqui ele só recupera o que ficou de fora
+        (uma gravação interrompida entre o upsert e a indexação).
+        """
+        if self.coletor.deduplicador:
+            self.coletor.deduplicador.sincronizar()
+        self.store.indice.sincronizar()
+
+    def exportar_se_pendente(self):
+        """Regrava o snapshot se houve notícias novas desde a última exportação"""
+        if self._snapshot_pendente:
+            self._snapshot_pendente = False
+            self.store.exportar_snapshot()
+
+    async def _esperar(self, segundos):
+        """Aguarda o tempo indicado; retorna True se o serviço foi interrompido"""
+        try:
+            await asyncio.wait_for(self._parar.wait(), timeout=segundos)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def gravar_termo(self, termo, noticias):
+        """Grava as notícias de um termo e registra no agendador quantas eram novas"""
+        novas = self.gravar(noticias)
+        self.agendador.registrar(termo, novas)
+        return novas
+
+    async def _ciclo_termo(self, termo, executor_rede, escritor, orcamento):
+        loop = asyncio.get_running_loop()
+        estado = self.estado.setdefault(termo, {'falhas': 0, 'ultima_coleta': None, 'novas': 0, 'erro': None})
+
+        # Espalha a primeira consulta de cada termo dentro do intervalo
+        if await self._esperar(random.uniform(0, self.intervalo_termo(termo) * self.jitter)):
+            return
+
+        while True:
+            # Termos na fila do orçamento desistem assim que o serviço é parado
+            if not await orcamento.adquirir(self._parar):
+                return
+            try:
+                noticias = await loop.run_in_executor(
+                    executor_rede, self.coletor.buscar_feed, termo, self.max_resultados
+                )
+                estado['novas'] = await loop.run_in_executor(escritor, self.gravar_termo, termo, noticias)
+                estado['falhas'] = 0
+                estado['erro'] = None
+            except Exception as e:
+                estado['falhas'] += 1
+                estado['erro'] = str(e)
+                print(f"Erro na coleta de '{termo}' (falha {estado['falhas']}): {e}")
+            estado['ultima_coleta'] = time.time()
+
+            if await self._esperar(self.proxima_espera(termo, estado['falhas'])):
+                return
+
+    async def _ciclo_snapshot(self, escritor):
+        loop = asyncio.get_running_loop()
+        while not await self._esperar(self.intervalo_snapshot):
+            try:
+                await loop.run_in_executor(escritor, self.exportar_se_pendente)
+                metricas.exportar()
+            except Exception as e:
+                print(f"Erro ao exportar o snapshot: {e}")
+
+    async def executar(self, termos=None):
+        """Executa a coleta contínua até parar() ser chamado"""
+        termos = self.coletor.termos_busca if termos is None else termos
+        self._loop = asyncio.get_running_loop()
+        self._parar = asyncio.Event()
+        orcamento = OrcamentoRequisicoes(self.agendador.requisicoes_por_minuto)
+        self.agendador.carregar(termos)
+
+        with ThreadPoolExecutor(max_workers=self.coletor.max_workers) as executor_rede, \
+                ThreadPoolExecutor(max_workers=1) as escritor:
+            await self._loop.run_in_executor(escritor, self.preparar_historico)
+            # Sem snapshot publicado (primeira execução): publica o que já está no banco
+            if versao_snapshot() is None:
+                self._snapshot_pendente = True
+                await self._loop.run_in_executor(escritor, self.exportar_se_pendente)
+            tarefas = [asyncio.ensure_future(self._ciclo_termo(termo, executor_rede, escritor, orcamento)) for termo in termos]
+            tarefas.append(asyncio.ensure_future(self._ciclo_snapshot(escritor)))
+            try:
+                await asyncio.gather(*tarefas)
+            finally:
+                for tarefa in tarefas:
+                    tarefa.cancel()
+                await asyncio.gather(*tarefas, return_exceptions=True)
+                # Grava no snapshot o que chegou desde a última exportação
+                escritor.submit(self.exportar_se_pendente).result()
+
+    def iniciar(self, termos=None):
+        """Executa o serviço em uma thread de segundo plano, com seu próprio loop"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self.executar(termos),), name='servico-coleta', daemon=True
+        )
+        self._thread.start()
+
+    def parar(self):
+        """Interrompe o serviço, aguardando as gravações em andamento"""
+        if self._loop is not None and self._parar is not None:
+            self._loop.call_soon_threadsafe(self._parar.set)
+        if self._thread:
+            self._thread.join()
+
+
+if __name__ == "__main__":
+    # Processo carregador: coleta, compacta o histórico e publica o snapshot
+    # lido pelos dashboards (MONITOR_DADOS_COMPARTILHADOS=1)
+    servico = ServicoColeta()
+    retencao = RetencaoHistorico(servico.store)
+    retencao.iniciar()
+    print(
+        f"Coletando {len(servico.coletor.termos_busca)} termos com até "
+        f"{servico.agendador.requisicoes_por_minuto} requisições por minuto (Ctrl+C para sair)"
+    )
+    try:
+        asyncio.run(servico.executar())
+    except KeyboardInterrupt:
+        print("Coleta interrompida")
+    finally:
+        retencao.parar()
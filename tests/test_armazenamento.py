@@ -0,0 +1,138 @@
+"""Gravação no NewsStore: cubo agregados_diarios e índice de frequências mantidos a cada upsert
+
+Uso: python -m unittest tests.test_armazenamento
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from armazenamento import NewsStore, chave_noticia
+
+
+def noticia(link, sentimento='positivo', pub_date='Mon, 12 Oct 2026 10:00:00 GMT', titulo='Hospital usa inteligência'):
+    return {
+        'title': titulo, 'link': f'https://exemplo.com/{link}', 'description': 'Hospital',
+        'pub_date': pub_date, 'search_term': 'IA Piauí', 'collected_at': '2026-10-12T12:00:00',
+        'sentiment': sentimento,
+    }
+
+
+class TestNewsStore(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.store = NewsStore(os.path.join(self.diretorio.name, 'noticias.db'))
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def consultar(self, sql):
+        with self.store.conectar() as conexao:
+            return conexao.execute(sql).fetchall()
+
+    def test_importacao_de_csv_entra_no_indice(self):
+        arquivo = os.path.join(self.diretorio.name, 'noticias_com_sentimento.csv')
+        pd.DataFrame([noticia('a'), noticia('b', 'negativo')]).to_csv(arquivo, index=False)
+        self.store.importar_csv(arquivo)
+
+        self.assertEqual(self.consultar('SELECT COUNT(*) FROM indice_documentos'), [(2,)])
+        self.assertEqual(self.store.indice.top_n(1, sentimento='negativo'), [('hospital', 2)])
+
+    def test_sentimento_reclassificado_move_o_indice(self):
+        self.store.upsert_noticias([noticia('a')])
+        self.store.upsert_noticias([noticia('a', 'negativo')])
+
+        self.assertEqual(self.store.indice.top_n(5, sentimento='positivo'), [])
+        self.assertEqual(self.store.indice.top_n(1, sentimento='negativo'), [('hospital', 2)])
+
+    def test_lote_sem_sentimento_nao_apaga_o_indexado(self):
+        self.store.upsert_noticias([noticia('a')])
+        self.store.upsert_noticias([noticia('a', None)])
+
+        self.assertEqual(self.consultar('SELECT sentiment FROM indice_documentos'), [('positivo',)])
+
+    def test_copia_descartada_nao_entra_no_indice_de_duplicatas(self):
+        original = noticia('original', titulo='Hospital do Piauí usa inteligência artificial - Jornal A')
+        copia = noticia('copia', titulo='Hospital do Piauí usa inteligência artificial - Jornal B')
+        self.store.upsert_noticias([original])
+
+        self.assertEqual(self.store.deduplicador.remover_quase_duplicatas([copia]), [])
+        self.assertEqual(
+            self.consultar('SELECT chave, canonica FROM dedup_assinaturas'),
+            [(chave_noticia(original), chave_noticia(original))]
+        )
+
+    def cubo(self):
+        return self.consultar('SELECT dia, search_term, sentiment, quantidade FROM agregados_diarios ORDER BY 1, 3')
+
+    def test_chaves_agregado_das_noticias_gravadas(self):
+        self.store.upsert_noticias([noticia('a'), noticia('b', None, pub_date=None)])
+        with self.store.conectar() as conexao:
+            agregados = self.store._chaves_agregado(conexao, [
+                chave_noticia(noticia('a')), chave_noticia(noticia('b')), 'https://exemplo.com/inexistente'
+            ])
+        self.assertEqual(agregados, {
+            chave_noticia(noticia('a')): ('2026-10-12', 'IA Piauí', 'positivo'),
+            # Sem data de publicação vale o dia da coleta; sem sentimento, texto vazio
+            chave_noticia(noticia('b')): ('2026-10-12', 'IA Piauí', ''),
+        })
+
+    def test_aplicar_deltas_soma_e_remove_celulas_zeradas(self):
+        with self.store.conectar(escrita=True) as conexao:
+            self.store._aplicar_deltas(conexao, {('2026-10-12', 'IA Piauí', 'positivo'): 2,
+                                                 ('2026-10-12', 'IA Piauí', 'negativo'): 1})
+            self.store._aplicar_deltas(conexao, {('2026-10-12', 'IA Piauí', 'positivo'): -1,
+                                                 ('2026-10-12', 'IA Piauí', 'negativo'): -1,
+                                                 ('2026-10-13', 'IA Piauí', 'neutro'): 0})
+        self.assertEqual(self.cubo(), [('2026-10-12', 'IA Piauí', 'positivo', 1)])
+
+    def test_regravar_com_outro_sentimento_move_o_cubo(self):
+        self.assertEqual(len(self.store.upsert_noticias([noticia('a'), noticia('b')])), 2)
+        self.assertEqual(self.store.upsert_noticias([noticia('a', 'negativo')]), [])
+
+        self.assertEqual(self.cubo(), [
+            ('2026-10-12', 'IA Piauí', 'negativo', 1), ('2026-10-12', 'IA Piauí', 'positivo', 1)
+        ])
+
+    def test_regravar_com_outra_data_move_o_cubo(self):
+        self.store.upsert_noticias([noticia('a')])
+        self.store.upsert_noticias([noticia('a', pub_date='Wed, 14 Oct 2026 09:00:00 GMT')])
+
+        self.assertEqual(self.cubo(), [('2026-10-14', 'IA Piauí', 'positivo', 1)])
+
+    def test_migracao_preenche_o_cubo_das_noticias_existentes(self):
+        self.store.upsert_noticias([noticia('a'), noticia('b'), noticia('c', 'negativo')])
+        # Banco da versão 0: notícias gravadas, cubo só com as compactadas (nenhuma)
+        conexao = sqlite3.connect(self.store.caminho)
+        with conexao:
+            conexao.execute('DELETE FROM agregados_diarios')
+            conexao.execute('PRAGMA user_version = 0')
+        conexao.close()
+
+        NewsStore(self.store.caminho)
+        self.assertEqual(self.cubo(), [
+            ('2026-10-12', 'IA Piauí', 'negativo', 1), ('2026-10-12', 'IA Piauí', 'positivo', 2)
+        ])
+        # Uma segunda abertura não conta de novo
+        NewsStore(self.store.caminho)
+        self.assertEqual(sum(linha[3] for linha in self.cubo()), 3)
+
+    def test_contagem_e_cubo_concordam_no_filtro_de_periodo(self):
+        self.store.upsert_noticias([
+            noticia('madrugada', pub_date='Mon, 05 Oct 2026 01:00:00 GMT'),
+            noticia('sem-data', pub_date=None),
+            noticia('antes', pub_date='Sun, 04 Oct 2026 23:00:00 GMT'),
+        ])
+        # Início no meio do dia: o período vale pelo dia inteiro nas duas consultas
+        inicio = datetime(2026, 10, 5, 12, tzinfo=timezone.utc)
+
+        self.assertEqual(self.store.contar(inicio=inicio), 2)
+        self.assertEqual(int(self.store.consultar_agregados(inicio=inicio)['quantidade'].sum()), 2)
+        self.assertEqual(len(self.store.consultar(inicio=inicio)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
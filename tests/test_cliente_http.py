@@ -0,0 +1,177 @@
+"""Novas tentativas, Retry-After e disjuntor do ClienteHTTP contra um servidor local com falhas injetadas
+
+Uso: python -m unittest tests.test_cliente_http
+"""
+import threading
+import time
+import unittest
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cliente_http import CircuitoAberto, ClienteHTTP
+
+
+class ServidorFalhas:
+    """Servidor HTTP local que responde cada caminho com uma sequência roteirizada
+
+    Cada passo é (status, cabeçalhos, atraso em segundos); depois do último
+    passo o caminho responde 200. As requisições recebidas são contadas por
+    caminho.
+    """
+
+    def __init__(self):
+        self.roteiros = defaultdict(list)
+        self.requisicoes = Counter()
+        self._trava = threading.Lock()
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with servidor._trava:
+                    servidor.requisicoes[self.path] += 1
+                    roteiro = servidor.roteiros[self.path]
+                    status, cabecalhos, atraso = roteiro.pop(0) if roteiro else (200, {}, 0)
+                if atraso:
+                    time.sleep(atraso)
+                corpo = b'ok'
+                self.send_response(status)
+                for nome, valor in cabecalhos.items():
+                    self.send_header(nome, valor)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        self.http.daemon_threads = True
+        self._thread = threading.Thread(target=self.http.serve_forever, daemon=True)
+        self._thread.start()
+
+    def roteiro(self, caminho, *passos):
+        """Define as respostas do caminho e retorna a sua URL"""
+        self.roteiros[caminho] = [passo if len(passo) == 3 else passo + (0,) for passo in passos]
+        return f"http://127.0.0.1:{self.http.server_port}{caminho}"
+
+    def encerrar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+class TestClienteHTTP(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ServidorFalhas()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.encerrar()
+
+    def cliente(self, **opcoes):
+        parametros = {'tentativas': 3, 'backoff_base': 0.01, 'backoff_max': 1, 'limite_falhas': 10,
+                      'tempo_aberto': 60}
+        parametros.update(opcoes)
+        return ClienteHTTP(**parametros)
+
+    def test_repete_503_ate_obter_resposta(self):
+        url = self.servidor.roteiro('/503', (503, {}), (503, {}))
+        with self.cliente().get(url) as resposta:
+            self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(self.servidor.requisicoes['/503'], 3)
+
+    def test_devolve_ultima_resposta_quando_as_tentativas_acabam(self):
+        url = self.servidor.roteiro('/esgotado', (503, {}), (503, {}), (503, {}))
+        with self.cliente().get(url) as resposta:
+            self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(self.servidor.requisicoes['/esgotado'], 3)
+
+    def test_status_fora_da_lista_nao_e_repetido(self):
+        url = self.servidor.roteiro('/404', (404, {}))
+        with self.cliente().get(url) as resposta:
+            self.assertEqual(resposta.status_code, 404)
+        self.assertEqual(self.servidor.requisicoes['/404'], 1)
+
+    def test_429_respeita_retry_after(self):
+        url = self.servidor.roteiro('/429', (429, {'Retry-After': '0.4'}))
+        inicio = time.monotonic()
+        with self.cliente().get(url) as resposta:
+            self.assertEqual(resposta.status_code, 200)
+        # A espera pedida pelo servidor substitui o backoff (0.01 s)
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.4)
+        self.assertEqual(self.servidor.requisicoes['/429'], 2)
+
+    def test_retry_after_longo_bloqueia_o_host(self):
+        cliente = self.cliente(backoff_max=0.5)
+        url = self.servidor.roteiro('/429-longo', (429, {'Retry-After': '30'}))
+        with cliente.get(url) as resposta:
+            # Espera maior que backoff_max: sem nova tentativa, a resposta volta para quem chamou
+            self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(self.servidor.requisicoes['/429-longo'], 1)
+        with self.assertRaises(CircuitoAberto):
+            with cliente.get(self.servidor.roteiro('/429-longo-depois')):
+                pass
+        self.assertEqual(self.servidor.requisicoes['/429-longo-depois'], 0)
+
+    def test_circuito_abre_apos_falhas_seguidas(self):
+        cliente = self.cliente(tentativas=1, limite_falhas=2)
+        url = self.servidor.roteiro('/circuito', (503, {}), (503, {}))
+        for _ in range(2):
+            with cliente.get(url) as resposta:
+                self.assertEqual(resposta.status_code, 503)
+        with self.assertRaises(CircuitoAberto):
+            with cliente.get(url):
+                pass
+        # A terceira requisição falhou sem chegar ao servidor
+        self.assertEqual(self.servidor.requisicoes['/circuito'], 2)
+
+    def test_meio_aberto_permite_uma_unica_requisicao_de_teste(self):
+        cliente = self.cliente(tentativas=1, limite_falhas=1, tempo_aberto=0.2)
+        with cliente.get(self.servidor.roteiro('/teste-falha', (503, {}))) as resposta:
+            self.assertEqual(resposta.status_code, 503)
+        time.sleep(0.25)
+
+        # Passado tempo_aberto, só a primeira requisição chega ao servidor (lenta);
+        # as concorrentes falham na hora enquanto o teste está em andamento
+        url = self.servidor.roteiro('/teste-lento', (200, {}, 0.5))
+        resultados = []
+
+        def requisitar():
+            try:
+                with cliente.get(url) as resposta:
+                    resultados.append(resposta.status_code)
+            except CircuitoAberto:
+                resultados.append('aberto')
+
+        teste = threading.Thread(target=requisitar)
+        teste.start()
+        time.sleep(0.1)
+        concorrentes = [threading.Thread(target=requisitar) for _ in range(3)]
+        for thread in concorrentes:
+            thread.start()
+        for thread in [teste] + concorrentes:
+            thread.join()
+
+        self.assertEqual(sorted(resultados, key=str), [200, 'aberto', 'aberto', 'aberto'])
+        self.assertEqual(self.servidor.requisicoes['/teste-lento'], 1)
+
+        # O teste bem-sucedido fecha o circuito
+        with cliente.get(self.servidor.roteiro('/teste-depois')) as resposta:
+            self.assertEqual(resposta.status_code, 200)
+
+    def test_teste_com_falha_reabre_o_circuito(self):
+        cliente = self.cliente(tentativas=1, limite_falhas=1, tempo_aberto=0.2)
+        url = self.servidor.roteiro('/reabre', (503, {}), (503, {}))
+        with cliente.get(url) as resposta:
+            self.assertEqual(resposta.status_code, 503)
+        time.sleep(0.25)
+        with cliente.get(url) as resposta:
+            self.assertEqual(resposta.status_code, 503)
+        with self.assertRaises(CircuitoAberto):
+            with cliente.get(url):
+                pass
+        self.assertEqual(self.servidor.requisicoes['/reabre'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Compactação da retenção e regravação das notícias já compactadas
+
+Uso: python -m unittest tests.test_retencao
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from armazenamento import NewsStore, chave_noticia
+from retencao import RetencaoHistorico
+
+
+def noticia(link, dias_atras, sentimento='positivo'):
+    publicada = datetime.now(timezone.utc) - timedelta(days=dias_atras)
+    return {
+        'title': f'Notícia {link}', 'link': f'https://exemplo.com/{link}', 'description': 'Descrição',
+        'pub_date': publicada.strftime('%a, %d %b %Y %H:%M:%S GMT'), 'search_term': 'IA Piauí',
+        'collected_at': datetime.now().isoformat(), 'sentiment': sentimento,
+    }
+
+
+class TestRetencao(unittest.TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.store = NewsStore(os.path.join(self.diretorio.name, 'noticias.db'))
+        self.retencao = RetencaoHistorico(self.store, janela_dias=30)
+
+    def tearDown(self):
+        self.diretorio.cleanup()
+
+    def total_cubo(self):
+        with self.store.conectar() as conexao:
+            return conexao.execute('SELECT COALESCE(SUM(quantidade), 0) FROM agregados_diarios').fetchone()[0]
+
+    def test_compactacao_mantem_a_contagem_no_cubo(self):
+        self.store.upsert_noticias([noticia('antiga', 60), noticia('recente', 1)])
+        self.assertEqual(self.retencao.compactar(), 1)
+        self.assertEqual(self.store.contar(), 1)
+        self.assertEqual(self.total_cubo(), 2)
+
+    def test_regravar_noticia_compactada_nao_conta_de_novo(self):
+        self.store.upsert_noticias([noticia('antiga', 60)])
+        self.retencao.compactar()
+
+        # Os feeds voltam a entregar a mesma notícia antiga
+        recente = noticia('recente', 1)
+        novas = self.store.upsert_noticias([noticia('antiga', 60, 'negativo'), recente])
+
+        self.assertEqual(novas, [chave_noticia(recente)])
+        self.assertEqual(self.store.contar(), 1)
+        self.assertEqual(self.total_cubo(), 2)
+        with self.store.conectar() as conexao:
+            sentimentos = dict(conexao.execute(
+                'SELECT sentiment, SUM(quantidade) FROM agregados_diarios GROUP BY sentiment'
+            ).fetchall())
+        self.assertEqual(sentimentos, {'positivo': 2})
+
+    def test_janela_maior_nao_recua_o_limite_compactado(self):
+        self.store.upsert_noticias([noticia('antiga', 60)])
+        self.retencao.compactar()
+        RetencaoHistorico(self.store, janela_dias=90).compactar()
+
+        self.assertEqual(self.store.upsert_noticias([noticia('antiga', 60)]), [])
+        self.assertEqual(self.total_cubo(), 1)
+
+    def test_compactar_sem_remover_nada_nao_recusa_importacoes(self):
+        self.retencao.compactar()
+
+        # CSV legado importado depois da primeira execução da retenção
+        antiga = noticia('antiga', 60)
+        self.assertEqual(self.store.upsert_noticias([antiga]), [chave_noticia(antiga)])
+        self.assertEqual(self.retencao.compactar(), 1)
+        self.assertEqual(self.total_cubo(), 1)
+
+    def test_poda_assinaturas_de_noticias_fora_do_banco(self):
+        antiga, recente = noticia('antiga', 60), noticia('recente', 1)
+        self.store.upsert_noticias([antiga, recente])
+        # Assinatura gravada sem a notícia correspondente (cópia descartada por versões anteriores)
+        self.store.deduplicador.agrupar([noticia('descartada', 1)])
+
+        self.retencao.compactar()
+
+        with self.store.conectar() as conexao:
+            assinaturas = [linha[0] for linha in conexao.execute('SELECT chave FROM dedup_assinaturas')]
+            bandas = {linha[0] for linha in conexao.execute('SELECT chave FROM dedup_bandas')}
+        self.assertEqual(assinaturas, [chave_noticia(recente)])
+        self.assertEqual(bandas, {chave_noticia(recente)})
+
+
+if __name__ == "__main__":
+    unittest.main()